@@ -0,0 +1,155 @@
+import json
+import mmap
+import os
+import pickle
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import global_variables as gv
+from object_pickler import atomic_open
+
+# looked up in this order, .p is the format of object_pickler
+extensions = [".npy", ".npz", ".parquet", ".jsonl", ".jsonl.zst", ".p", ".p.zst"]
+
+
+def artifact_file_name(name, extension=""):
+    return "%spython_objects/%s%s" % (gv.prj_src_path, name, extension)
+
+
+def find_extension(name):
+    for extension in extensions:
+        if os.path.exists(artifact_file_name(name, extension)):
+            return extension
+    return None
+
+
+def exists(name):
+    return find_extension(name) is not None
+
+
+def zstd():
+    # optional dependency, only needed with compress=True or to read .zst artifacts
+    import zstandard
+    return zstandard
+
+
+def is_array(python_object):
+    # lists only when every element has the same scalar type, mixed lists would be coerced to one dtype
+    if isinstance(python_object, np.ndarray):
+        return python_object.dtype != object
+    if not isinstance(python_object, (list, tuple)) or len(python_object) == 0:
+        return False
+    value_types = set(type(value) for value in python_object)
+    return len(value_types) == 1 and issubclass(value_types.pop(), (str, int, float, np.generic))
+
+
+def is_json_native(value):
+    # values json gives back with the same type: no tuples, no int keys, no numpy scalars
+    if value is None or type(value) in (str, int, float, bool):
+        return True
+    if type(value) is list:
+        return all(is_json_native(item) for item in value)
+    if type(value) is dict:
+        return all(type(key) is str and is_json_native(item) for key, item in value.items())
+    return False
+
+
+def is_text_map(python_object):
+    return type(python_object) is dict and all(type(key) is str and is_json_native(value)
+                                               for key, value in python_object.items())
+
+
+def save_text_map(file_name, text_map, compress):
+    # one "key<TAB>value" line per entry, both json encoded, so no raw tab or newline can appear inside them
+    with atomic_open(file_name) as f:
+        writer = zstd().ZstdCompressor().stream_writer(f, closefd=False) if compress else f
+        for key, value in text_map.items():
+            writer.write(("%s\t%s\n" % (json.dumps(key), json.dumps(value))).encode("utf-8"))
+        if compress:
+            writer.close()
+
+
+def save_pickle(file_name, python_object, compress):
+    with atomic_open(file_name) as f:
+        writer = zstd().ZstdCompressor().stream_writer(f, closefd=False) if compress else f
+        pickle.dump(python_object, writer, protocol=pickle.HIGHEST_PROTOCOL)
+        if compress:
+            writer.close()
+
+
+def save(name, python_object, compress=False):
+    # picks the format from the type, the write is atomic and replaces the artifact saved in any other format
+    if sparse.issparse(python_object):
+        extension = ".npz"
+        with atomic_open(artifact_file_name(name, extension)) as f:
+            sparse.save_npz(f, sparse.csr_matrix(python_object), compressed=compress)
+    elif isinstance(python_object, pd.DataFrame):
+        extension = ".parquet"
+        with atomic_open(artifact_file_name(name, extension)) as f:
+            python_object.to_parquet(f, engine="pyarrow", compression="zstd" if compress else None)
+    elif is_array(python_object):
+        extension = ".npy"
+        with atomic_open(artifact_file_name(name, extension)) as f:
+            np.save(f, np.asarray(python_object), allow_pickle=False)
+    elif is_text_map(python_object):
+        extension = ".jsonl.zst" if compress else ".jsonl"
+        save_text_map(artifact_file_name(name, extension), python_object, compress)
+    else:
+        extension = ".p.zst" if compress else ".p"
+        save_pickle(artifact_file_name(name, extension), python_object, compress)
+    for stale_extension in extensions:
+        if stale_extension != extension and os.path.exists(artifact_file_name(name, stale_extension)):
+            os.remove(artifact_file_name(name, stale_extension))
+    return artifact_file_name(name, extension)
+
+
+class TextMap(Mapping):
+    # read-only dict over a .jsonl artifact, keys are indexed on load and values decoded on access
+    def __init__(self, file_name, compressed=False):
+        with open(file_name, "rb") as f:
+            if compressed:
+                self.buffer = zstd().ZstdDecompressor().decompressobj().decompress(f.read())
+            elif os.fstat(f.fileno()).st_size == 0:
+                self.buffer = b""
+            else:
+                self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets = dict()
+        position = 0
+        while position < len(self.buffer):
+            end = self.buffer.find(b"\n", position)
+            separator = self.buffer.find(b"\t", position, end)
+            self.offsets[json.loads(self.buffer[position:separator])] = (separator + 1, end)
+            position = end + 1
+
+    def __getitem__(self, key):
+        start, end = self.offsets[key]
+        return json.loads(self.buffer[start:end])
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+
+def load(name, mmap_mode='r'):
+    # unlike object_pickler.load_object a missing artifact raises instead of returning an empty dict
+    extension = find_extension(name)
+    if extension is None:
+        raise FileNotFoundError(artifact_file_name(name))
+    file_name = artifact_file_name(name, extension)
+    if extension == ".npy":
+        return np.load(file_name, mmap_mode=mmap_mode, allow_pickle=False)
+    if extension == ".npz":
+        return sparse.load_npz(file_name)
+    if extension == ".parquet":
+        return pd.read_parquet(file_name, engine="pyarrow")
+    if extension.startswith(".jsonl"):
+        return TextMap(file_name, compressed=extension.endswith(".zst"))
+    with open(file_name, "rb") as f:
+        if extension.endswith(".zst"):
+            return pickle.loads(zstd().ZstdDecompressor().decompressobj().decompress(f.read()))
+        return pickle.load(f)
@@ -0,0 +1,96 @@
+import argparse
+import logging as log
+import time
+from itertools import islice
+
+import gensim
+from sklearn.feature_extraction import FeatureHasher
+
+import doc2vec_inference as dvi
+import feature_store as fs
+import file_collector as fc
+import global_variables as gv
+import model_store as ms
+import timer
+from document_tokenizer import tokenize_documents
+
+log.basicConfig(filename='batch_inference.log', level=log.DEBUG, filemode="w")
+
+
+def iter_batches(iterable, batch_size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if len(batch) == 0:
+            return
+        yield batch
+
+
+def hash_binary(hasher, batch):
+    # same binary hashed features as data_processor.iter_hashed_chunks
+    matrix = hasher.transform([token_keys for _, token_keys, _ in batch])
+    matrix.data.fill(1.0)
+    return matrix
+
+
+def load_vectorize(metadata):
+    # returns a function turning a batch of non-empty tokenize_documents tuples into a feature matrix
+    if metadata["features"] == "doc2vec":
+        model = dvi.load_model(gv.prj_src_path + "python_objects/document_model.doc2vec")
+        return lambda batch: [model.infer_vector(gensim.utils.simple_preprocess(text)) for _, _, text in batch]
+    if metadata["features"] == "hashed":
+        hasher = FeatureHasher(n_features=metadata["n_features"], input_type="string", alternate_sign=False)
+        return lambda batch: hash_binary(hasher, batch)
+    vectorizer = fs.load_vectorizer("data_transformed")
+    return lambda batch: vectorizer.transform([dict.fromkeys(token_keys, 1.0) for _, token_keys, _ in batch])
+
+
+def predict_label(prediction, s_u):
+    # supervised models predict translated class indexes, clusters have no name
+    if s_u == "unsupervised":
+        return str(prediction), ""
+    label = gv.translation_rev[int(prediction)]
+    return label, gv.label_name[label]
+
+
+def predict_directory(input_dir, model_name, output_file_name, batch_size=1000, n_process=1):
+    clf, metadata = ms.load_model(model_name)
+    vectorize = load_vectorize(metadata)
+    file_paths = fc.get_all_files_from_directory(input_dir)
+    log.info("%s documents in %s" % (len(file_paths), input_dir))
+
+    documents = tokenize_documents(file_paths, n_process=n_process, batch_size=batch_size,
+                                   mask_texts=metadata["features"] == "doc2vec", src_path="")
+    with open(output_file_name, "wt", encoding="utf-8") as f:
+        for batch in iter_batches(documents, batch_size):
+            # documents without tokens were left out of training too, they are flagged instead of predicted
+            empty = [file_path_ for file_path_, token_keys, _ in batch if len(token_keys) == 0]
+            for file_path_ in empty:
+                f.write("%s\t\tempty document\n" % file_path_)
+            batch = [document for document in batch if len(document[1]) > 0]
+            if len(batch) > 0:
+                for (file_path_, _, _), prediction in zip(batch, clf.predict(vectorize(batch))):
+                    f.write("%s\t%s\t%s\n" % ((file_path_,) + predict_label(prediction, metadata["type"])))
+            log.debug("%s documents predicted, %s empty" % (len(batch), len(empty)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Predict document classes for a directory of new text files")
+    parser.add_argument("input_dir")
+    parser.add_argument("--model", default="SVC_linear_train_vector",
+                        help="model saved by document_clustering.train_test, <algorithm>_<data>")
+    parser.add_argument("--output", default="predictions.tsv")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+    predict_directory(args.input_dir, args.model, args.output, batch_size=args.batch_size, n_process=args.n_process)
+
+
+if __name__ == '__main__':
+    start = time.time()
+    log.info(("Batch inference started: ", time.localtime(start)))
+    try:
+        main()
+    except Exception as ex:
+        log.exception(ex)
+    timer.time_executed(start, "Batch inference")
@@ -0,0 +1,48 @@
+import logging as log
+import time
+
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import v_measure_score
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import Normalizer
+
+
+def make_clusterer(method, n_clusters, batch_size=10000, random_state=0):
+    if method == "kmeans":
+        return KMeans(n_clusters=n_clusters, random_state=random_state)
+    if method == "minibatch":
+        return MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, random_state=random_state)
+    if method == "spherical":
+        # cosine k-means: on unit length rows the euclidean assignment is the cosine one
+        return make_pipeline(Normalizer(), MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size,
+                                                           random_state=random_state))
+    if method == "spherical_kmeans":
+        return make_pipeline(Normalizer(), KMeans(n_clusters=n_clusters, random_state=random_state))
+    raise ValueError("unknown clustering method: %s" % method)
+
+
+def inertia(clusterer):
+    if hasattr(clusterer, "steps"):
+        clusterer = clusterer.steps[-1][1]
+    return float(clusterer.inertia_)
+
+
+def run_clustering(data, method, n_clusters, labels=None, random_state=0):
+    start = time.time()
+    clusterer = make_clusterer(method, n_clusters, random_state=random_state)
+    predict = clusterer.fit_predict(data)
+    result = {"method": method, "n_clusters": n_clusters, "inertia": inertia(clusterer),
+              "wall_seconds": time.time() - start}
+    if labels is not None:
+        result["v_measure"] = v_measure_score(labels, predict)
+    log.info("clustering: %s" % result)
+    return clusterer, predict, result
+
+
+def sweep_k(data, n_clusters_list, methods=("minibatch",), labels=None, n_jobs=-1):
+    # every (method, k) run is independent, the data is shared with the workers as a read-only memmap
+    runs = Parallel(n_jobs=n_jobs, max_nbytes='1M', mmap_mode='r')(
+        delayed(run_clustering)(data, method, n_clusters, labels)
+        for method in methods for n_clusters in n_clusters_list)
+    return [result for _, _, result in runs]
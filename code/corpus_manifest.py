@@ -0,0 +1,143 @@
+import logging as log
+import os
+import posixpath
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import data_labeller as dl
+import document_cache as dc
+import global_variables as gv
+
+label_files = {"train": gv.train_label_file_name, "test": gv.test_label_file_name, "val": gv.val_label_file_name}
+
+schema = """
+CREATE TABLE IF NOT EXISTS directories (path TEXT PRIMARY KEY, parent TEXT, mtime REAL);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime REAL, hash TEXT);
+CREATE TABLE IF NOT EXISTS label_files (split TEXT PRIMARY KEY, mtime REAL);
+CREATE TABLE IF NOT EXISTS labels (split TEXT, position INTEGER, path TEXT, label TEXT, PRIMARY KEY (split, path));
+"""
+
+
+def manifest_file_name():
+    return gv.prj_src_path + "python_objects/corpus_manifest.sqlite"
+
+
+def connect():
+    connection = sqlite3.connect(manifest_file_name())
+    connection.executescript(schema)
+    return connection
+
+
+def scan_files(connection, src_path, skip_unchanged_directories=False):
+    # every file is stat'ed through scandir and compared by size and mtime; with skip_unchanged_directories a
+    # directory whose mtime is unchanged is not listed again, which misses files modified in place
+    known_directories = dict(connection.execute("SELECT path, mtime FROM directories"))
+    known_files = dict((path, (size, mtime)) for path, size, mtime in
+                       connection.execute("SELECT path, size, mtime FROM files"))
+    seen_directories = dict()
+    listed_directories = set()
+    listed_files = set()
+    changed = list()
+    stack = [""]
+    while stack:
+        directory = stack.pop()
+        try:
+            mtime = os.stat(os.path.join(src_path, directory)).st_mtime
+        except FileNotFoundError:
+            continue
+        seen_directories[directory] = mtime
+        if skip_unchanged_directories and known_directories.get(directory) == mtime:
+            stack.extend(path for path, in connection.execute("SELECT path FROM directories WHERE parent = ?",
+                                                              (directory,)))
+            continue
+        listed_directories.add(directory)
+        with os.scandir(os.path.join(src_path, directory)) as entries:
+            for entry in entries:
+                path = posixpath.join(directory, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(path)
+                elif entry.is_file() and entry.name not in label_files.values():
+                    stat = entry.stat()
+                    listed_files.add(path)
+                    if known_files.get(path) != (stat.st_size, stat.st_mtime):
+                        changed.append((path, stat.st_size, stat.st_mtime))
+
+    removed = [path for path in known_files if path not in listed_files and (
+            posixpath.dirname(path) in listed_directories or posixpath.dirname(path) not in seen_directories)]
+    connection.execute("DELETE FROM directories")
+    connection.executemany("INSERT INTO directories VALUES (?, ?, ?)",
+                           ((path, posixpath.dirname(path) if path else None, mtime)
+                            for path, mtime in seen_directories.items()))
+    return changed, removed
+
+
+def refresh_files(connection, src_path, skip_unchanged_directories=False, n_threads=8):
+    changed, removed = scan_files(connection, src_path, skip_unchanged_directories)
+    connection.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in removed))
+    # only new or modified files are hashed
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        hashes = executor.map(dc.content_hash, [os.path.join(src_path, path) for path, _, _ in changed])
+        connection.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                               ((path, size, mtime, content_hash)
+                                for (path, size, mtime), content_hash in zip(changed, hashes)))
+    log.info(("Manifest files changed:", len(changed), "removed:", len(removed)))
+
+
+def refresh_labels(connection, src_path):
+    # a label file is parsed again only when its mtime changed
+    for split, label_file_name in label_files.items():
+        mtime = os.stat(src_path + label_file_name).st_mtime
+        if connection.execute("SELECT mtime FROM label_files WHERE split = ?", (split,)).fetchone() == (mtime,):
+            continue
+        table = dl.read_label_file(label_file_name, src_path)
+        connection.execute("DELETE FROM labels WHERE split = ?", (split,))
+        connection.executemany("INSERT INTO labels VALUES (?, ?, ?, ?)",
+                               ((split, position, path, label)
+                                for position, (path, label) in enumerate(zip(table["path"], table["label"]))))
+        connection.execute("INSERT OR REPLACE INTO label_files VALUES (?, ?)", (split, mtime))
+        log.info(("Manifest labels refreshed:", split, len(table)))
+
+
+def refresh(src_path=None, skip_unchanged_directories=False, n_threads=8):
+    if src_path is None:
+        src_path = gv.data_src_path
+    with connect() as connection:
+        refresh_files(connection, src_path, skip_unchanged_directories, n_threads)
+        refresh_labels(connection, src_path)
+    connection.close()
+
+
+def labels_by_path(split, with_3=False):
+    # same order and content as data_labeller.get_labels (get_labels_w_3 with with_3=True)
+    with connect() as connection:
+        rows = connection.execute("SELECT path, label FROM labels WHERE split = ? AND (? OR label != '3') "
+                                  "ORDER BY position", (split, with_3)).fetchall()
+    connection.close()
+    return dict(rows)
+
+
+def label_arrays(split):
+    # path index and int8 translated labels without class 3, see data_labeller.load_labels
+    with connect() as connection:
+        table = pd.read_sql_query("SELECT path, label FROM labels WHERE split = ? AND label != '3' "
+                                  "ORDER BY position", connection, params=(split,))
+    connection.close()
+    return pd.Index(table["path"]), dl.translate(table["label"].values)
+
+
+def file_stats():
+    with connect() as connection:
+        stats = dict((path, (size, mtime)) for path, size, mtime in
+                     connection.execute("SELECT path, size, mtime FROM files"))
+    connection.close()
+    return stats
+
+
+def file_hashes():
+    with connect() as connection:
+        hashes = dict(connection.execute("SELECT path, hash FROM files"))
+    connection.close()
+    return hashes
@@ -0,0 +1,141 @@
+import json
+import logging as log
+import mmap
+import os
+import shutil
+import threading
+
+import corpus_manifest as cm
+import global_variables as gv
+from object_pickler import atomic_open
+
+# loaded on first read, shared by the prefetch threads of file_collector
+shard_index = None
+shard_maps = dict()
+shard_lock = threading.Lock()
+
+
+def shard_dir():
+    return gv.prj_src_path + "python_objects/corpus_shards/"
+
+
+def index_file_name():
+    return shard_dir() + "index.json"
+
+
+def generation_dir(generation):
+    return shard_dir() + "generation_%05d/" % generation
+
+
+def shard_file_name(generation, shard):
+    return generation_dir(generation) + "shard_%05d.bin" % shard
+
+
+def exists():
+    return os.path.exists(index_file_name())
+
+
+def plan_shards(file_stats, shard_size):
+    shards = [[]]
+    total = 0
+    for file_path_ in sorted(file_stats):
+        size = file_stats[file_path_][0]
+        if len(shards[-1]) > 0 and total + size > shard_size:
+            shards.append([])
+            total = 0
+        shards[-1].append(file_path_)
+        total += size
+    return shards
+
+
+def pack(file_stats, src_path=None, shard_size=1 << 30):
+    # file_stats: relative path -> (size, mtime), as corpus_manifest.file_stats returns it
+    # files are concatenated into shards of about shard_size bytes, the index maps each path to its byte range
+    global shard_index
+    if src_path is None:
+        src_path = gv.data_src_path
+    previous = read_index_file()
+    # every pack writes a new generation, readers of the previous index keep valid byte ranges until it is swapped
+    generation = previous.get("generation", -1) + 1 if previous is not None else 0
+    os.makedirs(generation_dir(generation), exist_ok=True)
+    files = dict()
+    shards = plan_shards(file_stats, shard_size)
+    for shard, file_paths in enumerate(shards):
+        offset = 0
+        with atomic_open(shard_file_name(generation, shard)) as f:
+            for file_path_ in file_paths:
+                try:
+                    with open(src_path + file_path_, 'rb') as source:
+                        data = source.read()
+                        stat = os.fstat(source.fileno())
+                except Exception as ex:
+                    log.warning(("Error pack file: ", file_path_))
+                    log.error(ex)
+                    continue
+                f.write(data)
+                files[file_path_] = [shard, offset, len(data), stat.st_size, stat.st_mtime]
+                offset += len(data)
+        log.info(("Shard packed:", shard_file_name(generation, shard), len(file_paths), offset))
+    with atomic_open(index_file_name(), "wt", encoding="utf-8") as f:
+        json.dump({"generation": generation, "src_path": src_path, "files": files}, f)
+    # the generation before the previous one is no longer referenced by any index a reader can hold
+    for name in os.listdir(shard_dir()):
+        if name.startswith("generation_") and int(name[len("generation_"):]) < generation - 1:
+            shutil.rmtree(shard_dir() + name)
+    with shard_lock:
+        shard_index = None
+        shard_maps.clear()
+    return len(files)
+
+
+def read_index_file():
+    if not exists():
+        return None
+    with open(index_file_name(), "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_index():
+    global shard_index
+    with shard_lock:
+        if shard_index is None:
+            shard_index = read_index_file()
+            if shard_index is None or "generation" not in shard_index:
+                # not packed, or packed in the layout without generations which has to be packed again
+                shard_index = {"generation": None, "files": dict()}
+            else:
+                # freshness is decided once against the manifest snapshot of corpus_manifest.refresh instead of a
+                # stat per read on the network mount, files changed since the pack are read from disk
+                file_stats = cm.file_stats()
+                shard_index["files"] = dict((file_path_, entry) for file_path_, entry in shard_index["files"].items()
+                                            if list(file_stats.get(file_path_, ())) == entry[3:])
+    return shard_index
+
+
+def read_bytes(file_path_):
+    # None when the file is not packed, changed since it was packed or its shard cannot be read
+    index = load_index()
+    entry = index["files"].get(file_path_)
+    if entry is None:
+        return None
+    shard, offset, length = entry[:3]
+    if length == 0:
+        return b""
+    try:
+        with shard_lock:
+            if shard not in shard_maps:
+                with open(shard_file_name(index["generation"], shard), 'rb') as f:
+                    shard_maps[shard] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as ex:
+        # e.g. a generation removed by a later pack under a long-lived reader
+        log.warning(("Error shard read, read from disk: ", file_path_))
+        log.error(ex)
+        return None
+    return shard_maps[shard][offset:offset + length]
+
+
+def stale_files(file_stats):
+    # files added or modified since the corpus was packed, they are read from disk until the next pack
+    files = load_index()["files"]
+    return [file_path_ for file_path_, stat in file_stats.items()
+            if file_path_ not in files or files[file_path_][3:] != list(stat)]
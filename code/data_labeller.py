@@ -1,5 +1,11 @@
+import csv
 import logging as log
 
+import numpy as np
+import pandas as pd
+
+import global_variables as gv
+
 
 def get_labels(lines, file_path):
     paths_by_label = dict(('{}'.format(k), []) for k in range(16))
@@ -28,3 +34,46 @@ def get_labels_w_3(lines, file_path):
         else:
             log.error((str(index + 1) + " : " + str(line)))
     return paths_by_label, labels_by_path
+
+
+def read_label_file(label_file_name, src_path=None):
+    # "<path> <class>" lines in one pass, malformed lines are logged and dropped; like the dicts of get_labels_w_3
+    # a repeated path keeps the position of its first line and the label of its last one
+    if src_path is None:
+        src_path = gv.data_src_path
+    table = pd.read_csv(src_path + label_file_name, sep=" ", header=None, names=["path", "label"], dtype=str,
+                        quoting=csv.QUOTE_NONE, keep_default_na=False, error_bad_lines=False, warn_bad_lines=True)
+    valid = table["label"].isin(gv.label_name)
+    if not valid.all():
+        log.error(("malformed lines in ", label_file_name, int((~valid).sum())))
+    table = table[valid].copy()
+    table["label"] = table.groupby("path")["label"].transform("last")
+    return table.drop_duplicates("path", keep="first").reset_index(drop=True)
+
+
+def translate(labels):
+    # class strings ("0".."15") to translated int8 labels, class 3 and unknown classes raise
+    labels = np.asarray(labels)
+    if labels.dtype.kind not in "UO":
+        raise TypeError("expected class strings, got %s labels" % labels.dtype)
+    classes, inverse = np.unique(labels.astype(str), return_inverse=True)
+    untranslatable = [label for label in classes if label not in gv.translation]
+    if len(untranslatable) > 0:
+        raise ValueError("labels without a translation: %s" % untranslatable)
+    return np.array([gv.translation[label] for label in classes], dtype=np.int8)[inverse]
+
+
+def load_labels(label_file_name, src_path=None):
+    # path index and int8 translated labels without class 3, in the order of the label file
+    log.info(("load labels from ", label_file_name))
+    table = read_label_file(label_file_name, src_path)
+    table = table[table["label"] != "3"]
+    return pd.Index(table["path"]), translate(table["label"].values)
+
+
+def as_translated(labels):
+    # label artifacts are saved as int8 translated arrays, class string artifacts saved before them are translated
+    labels = np.asarray(labels)
+    if labels.dtype.kind in "iu":
+        return labels.astype(np.int8, copy=False)
+    return translate(labels)
@@ -1,58 +1,114 @@
-import json
 import logging as log
+import multiprocessing
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from itertools import repeat
 
+import numpy as np
 import spacy
 from gensim.corpora import Dictionary
+from gensim.corpora import MmCorpus
 from gensim.models import LdaModel
+from gensim.models import LdaMulticore
 from gensim.models import Phrases
+from gensim.models.phrases import Phraser
 from gensim.models.doc2vec import Doc2Vec
 from nltk.stem.wordnet import WordNetLemmatizer
+from scipy import sparse
 from scipy.sparse import csr as _csr
 from sklearn.feature_extraction import DictVectorizer
+from sklearn.feature_extraction import FeatureHasher
 
-import file_collector as fc
+import artifact_store as ars
+import corpus_manifest as cm
+import doc2vec_inference as dvi
+import document_cache as dc
+import feature_store as fs
 import global_variables as gv
-import object_pickler as op
 import timer
-from preprocessGenerator import PreprocessGenerator
+import vector_store as vs
+from document_tokenizer import spacy_disable
+from document_tokenizer import spacy_model
+from document_tokenizer import spacy_model_version
+from document_tokenizer import stop_words_file_name
+from document_tokenizer import tokenize_documents
+from document_tokenizer import tokenizer
+from preprocessGenerator import TokenizedCorpus
+from preprocessGenerator import write_corpus_file
 
 log.basicConfig(filename='data_processor.log', level=log.DEBUG, filemode="w")
 
-
-def load_stop_words():
-    with open(gv.prj_src_path + "data/stopwords-en.txt", "rt", encoding="utf-8-sig") as infile:
-        stopwords_en = json.load(infile)["en"]
-        return stopwords_en
+wordnet_lemmatizer = WordNetLemmatizer()
 
 
 def load_lda_dictionary(dict_name):
     return Dictionary.load_from_text("%spython_objects/%s.dict" % (gv.prj_src_path, dict_name))
 
 
-def preprocess_for_lda(train_corpus_tokens_only):
-    lemmatizer = WordNetLemmatizer()
-    docs = [[lemmatizer.lemmatize(token) for token in doc] for doc in train_corpus_tokens_only]
-    bigram = Phrases(docs, min_count=20)
-    for idx in range(len(docs)):
-        for token in bigram[docs[idx]]:
-            if '_' in token:
-                # Token is a bigram, add to document.
-                docs[idx].append(token)
+def lda_corpus_file_name(corpus_name):
+    return "%spython_objects/%s.mm" % (gv.prj_src_path, corpus_name)
+
+
+def load_lda_corpus(corpus_name):
+    # streamed from disk, documents can be accessed by offset through the .mm.index file
+    return MmCorpus(lda_corpus_file_name(corpus_name))
+
+
+@lru_cache(maxsize=None)
+def lemmatize(token):
+    # the vocabulary is far smaller than the number of tokens, every worker memoizes its lemmas
+    return wordnet_lemmatizer.lemmatize(token)
+
+
+def lemmatize_documents(docs):
+    return [[lemmatize(token) for token in doc] for doc in docs]
+
+
+def iter_chunks(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if len(chunk) == 0:
+            return
+        yield chunk
+
+
+def add_bigrams(doc, bigram):
+    # Token is a bigram, add to document.
+    doc.extend([token for token in bigram[doc] if '_' in token])
+    return doc
+
+
+def preprocess_for_lda(train_corpus_tokens_only, chunk_size=10000, n_jobs=None):
+    # lemmatize once in a process pool, learn the bigram statistics on the way and keep the lemmas on disk
+    bigram_phrases = Phrases(min_count=20)
+    with multiprocessing.Pool(n_jobs) as pool, open(corpus_file_name("lda_lemmas"), "wt", encoding="utf-8") as f:
+        for docs in pool.imap(lemmatize_documents, iter_chunks(train_corpus_tokens_only, chunk_size)):
+            bigram_phrases.add_vocab(docs)
+            f.writelines(" ".join(doc) + "\n" for doc in docs)
+    bigram = Phraser(bigram_phrases)
+    lemmatized_docs = TokenizedCorpus(corpus_file_name("lda_lemmas"), tokens_only=True)
+
     # Create a dictionary representation of the documents.
-    dictionary = Dictionary(docs)
+    dictionary = Dictionary()
+    for docs in iter_chunks(lemmatized_docs, chunk_size):
+        dictionary.add_documents([add_bigrams(doc, bigram) for doc in docs])
 
     # Filter out words that occur less than 20 documents, or more than 50% of the documents.
     dictionary.filter_extremes(no_below=20, no_above=0.5)
     dictionary.save_as_text("%spython_objects/dataset.dict" % gv.prj_src_path)
     # Bag-of-words representation of the documents.
-    corpus = [dictionary.doc2bow(doc) for doc in docs]
-    op.save_object(corpus, gv.prj_src_path + "python_objects/corpus")
+    MmCorpus.serialize(lda_corpus_file_name("corpus"),
+                       (dictionary.doc2bow(add_bigrams(doc, bigram)) for doc in lemmatized_docs), id2word=dictionary)
+    corpus = load_lda_corpus("corpus")
     log.info("corpus length: %s" % len(corpus))
     return corpus, dictionary
 
 
-def generate_lda_model(corpus, dictionary, num_topics, passes):
+def generate_lda_model(corpus, dictionary, num_topics, passes, alpha='auto', eta='auto', workers=None):
     # Set training parameters.
     chunksize = 2000
     iterations = 400
@@ -61,32 +117,112 @@ def generate_lda_model(corpus, dictionary, num_topics, passes):
     # Make a index to word dictionary.
     id2word = dictionary.id2token
 
-    lda_model = LdaModel(
-        corpus=corpus,
-        id2word=id2word,
-        chunksize=chunksize,
-        alpha='auto',
-        eta='auto',
-        iterations=iterations,
-        num_topics=num_topics,
-        passes=passes,
-        eval_every=eval_every
-    )
+    if workers is None or alpha == 'auto':
+        # LdaMulticore can not learn an asymmetric alpha
+        lda_model = LdaModel(
+            corpus=corpus,
+            id2word=id2word,
+            chunksize=chunksize,
+            alpha=alpha,
+            eta=eta,
+            iterations=iterations,
+            num_topics=num_topics,
+            passes=passes,
+            eval_every=eval_every
+        )
+    else:
+        lda_model = LdaMulticore(
+            corpus=corpus,
+            id2word=id2word,
+            chunksize=chunksize,
+            alpha=alpha,
+            eta=eta,
+            iterations=iterations,
+            num_topics=num_topics,
+            passes=passes,
+            eval_every=eval_every,
+            workers=workers
+        )
     lda_model.save("%spython_objects/document_model_%s_%s.lda" % (gv.prj_src_path, str(num_topics), str(passes)))
 
 
+def train_lda_config(config):
+    # the corpus is streamed from its .mm file in each worker instead of being pickled into every task
+    corpus_name, dictionary_name, num_topics, passes, alpha, eta, workers = config
+    corpus = load_lda_corpus(corpus_name)
+    dictionary = load_lda_dictionary(dictionary_name)
+    process_start = time.time()
+    log.info(("LDA_%s_%s: " % (num_topics, passes), time.localtime(process_start)))
+    generate_lda_model(corpus, dictionary, num_topics=num_topics, passes=passes, alpha=alpha, eta=eta,
+                       workers=workers)
+    timer.time_executed(process_start, "LDA_%s_%s" % (num_topics, passes))
+    return num_topics, passes, time.time() - process_start
+
+
+def generate_lda_models(corpus_name, dictionary_name, num_topics_passes_tuple_list, alpha='auto', eta='auto',
+                        n_jobs=None):
+    if n_jobs is None:
+        n_jobs = multiprocessing.cpu_count()
+    if alpha == 'auto':
+        # single core LdaModel per config, the configs run side by side
+        workers = None
+        concurrent_configs = min(len(num_topics_passes_tuple_list), n_jobs)
+    else:
+        # one config at a time, LdaMulticore spreads it over the cores (one core is left for its master process)
+        workers = max(1, n_jobs - 1)
+        concurrent_configs = 1
+    configs = [(corpus_name, dictionary_name, num_topics, passes, alpha, eta, workers)
+               for num_topics, passes in num_topics_passes_tuple_list]
+
+    wall_times = dict()
+    if concurrent_configs == 1:
+        results = map(train_lda_config, configs)
+        for num_topics, passes, wall_time in results:
+            wall_times[(num_topics, passes)] = wall_time
+    else:
+        with multiprocessing.Pool(concurrent_configs) as pool:
+            for num_topics, passes, wall_time in pool.imap_unordered(train_lda_config, configs):
+                wall_times[(num_topics, passes)] = wall_time
+    for (num_topics, passes), wall_time in wall_times.items():
+        log.info("LDA_%s_%s wall time: %.2fs" % (num_topics, passes, wall_time))
+    return wall_times
+
+
+def doc2vec_model_file_name():
+    return gv.prj_src_path + "python_objects/document_model.doc2vec"
+
+
 def load_doc2vec_model():
-    return Doc2Vec.load(gv.prj_src_path + "python_objects/document_model.doc2vec")
+    return Doc2Vec.load(doc2vec_model_file_name())
+
+
+def corpus_file_name(data_type):
+    return "%spython_objects/%s_corpus.txt" % (gv.prj_src_path, data_type)
+
+
+def generate_doc2vec_model(train_corpus=None, corpus_file=None, workers=None):
+    # corpus_file training releases the GIL, every core gets a worker thread
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    doc2vec_model = Doc2Vec(vector_size=300, min_count=2, epochs=50, workers=workers)
+    if corpus_file is not None:
+        # every epoch reads the tokenized file in the worker threads, no python iterator in between
+        doc2vec_model.build_vocab(corpus_file=corpus_file)
+        doc2vec_model.train(corpus_file=corpus_file, total_examples=doc2vec_model.corpus_count,
+                            total_words=doc2vec_model.corpus_total_words, epochs=doc2vec_model.epochs)
+    else:
+        doc2vec_model.build_vocab(train_corpus)
+        doc2vec_model.train(train_corpus, total_examples=doc2vec_model.corpus_count, epochs=doc2vec_model.iter)
+    doc2vec_model.save(doc2vec_model_file_name())
 
 
-def generate_doc2vec_model(train_corpus):
-    doc2vec_model = Doc2Vec(vector_size=300, min_count=2, epochs=50)
-    doc2vec_model.build_vocab(train_corpus)
-    doc2vec_model.train(train_corpus, total_examples=doc2vec_model.corpus_count, epochs=doc2vec_model.iter)
-    doc2vec_model.save(gv.prj_src_path + "python_objects/document_model.doc2vec")
+def corpus_paths(modified_texts):
+    # document paths in the order the corpus file yields them
+    return [file_path_ for file_path_, tcd in modified_texts.items() if len(tcd.strip()) != 0]
 
 
-def dict_vectorizer(data_dict, label_dict, test_data_dict, test_label_dict, val_data_dict, val_label_dict):
+def dict_vectorizer(data_dict, label_dict, test_data_dict, test_label_dict, val_data_dict, val_label_dict,
+                    vocabulary_name=None):
     labels = list()
     test_labels = list()
     val_labels = list()
@@ -112,102 +248,147 @@ def dict_vectorizer(data_dict, label_dict, test_data_dict, test_label_dict, val_
     data_transformed = dv.fit_transform(data)
     test_data_transformed = dv.transform(test_data)
     val_data_transformed = dv.transform(val_data)
+    if vocabulary_name is not None:
+        fs.save_vocabulary(vocabulary_name, dv)
     return data_transformed, labels, test_data_transformed, test_labels, val_data_transformed, val_labels
 
 
-def tokenizer(required_files):
-    stopwords_en = load_stop_words()
+def iter_hashed_chunks(documents, n_features=2 ** 20, chunk_size=10000):
+    # binary bag of words in a fixed-width hashed feature space, emitted as CSR chunks
+    hasher = FeatureHasher(n_features=n_features, input_type="string", alternate_sign=False)
+    for chunk in iter_chunks(documents, chunk_size):
+        yield binarize(hasher.transform(chunk))
 
-    nlp = spacy.load("en_core_web_sm")
+
+def binarize(matrix):
+    # hash collisions add up, keep the features binary like the DictVectorizer path
+    matrix.data.fill(1.0)
+    return matrix
+
+
+def hashing_vectorizer(required_files, label_dict, n_features=2 ** 20, chunk_size=10000, n_process=1,
+                       batch_size=1000):
+    labels = list()
+
+    def non_empty_documents():
+        for file_path_, token_keys, _ in tokenize_documents(required_files, n_process=n_process,
+                                                            batch_size=batch_size, mask_texts=False):
+            if len(token_keys) != 0:
+                labels.append(label_dict[file_path_])
+                yield token_keys
+
+    chunks = list(iter_hashed_chunks(non_empty_documents(), n_features=n_features, chunk_size=chunk_size))
+    if len(chunks) == 0:
+        return sparse.csr_matrix((0, n_features)), labels
+    return sparse.vstack(chunks, format="csr"), labels
+
+
+def tokenizer_config(legacy_num_masking):
+    return {"spacy": spacy.__version__, "model": spacy_model, "model_version": spacy_model_version(),
+            "disable": spacy_disable, "stop_words": dc.content_hash(stop_words_file_name()),
+            "legacy_num_masking": legacy_num_masking}
+
+
+def file_hash(file_path_, manifest_stats, manifest_hashes):
+    # the manifest hash only while the file has the size and mtime it was hashed with, otherwise it is hashed again
+    try:
+        stat = os.stat(gv.data_src_path + file_path_)
+        if manifest_stats.get(file_path_) == (stat.st_size, stat.st_mtime):
+            return manifest_hashes[file_path_]
+    except OSError:
+        pass
+    return dc.content_hash(gv.data_src_path + file_path_)
+
+
+def cached_tokenizer(required_files, cache_name, n_process=1, batch_size=1000, legacy_num_masking=False,
+                     n_threads=8):
+    cache = dc.load_cache(cache_name)
+    stale = dc.evict_stale(cache, required_files)
+    key = dc.config_key(tokenizer_config(legacy_num_masking))
+    # hashes from the corpus manifest, checked against a stat of each file in case it is out of date
+    manifest_stats = cm.file_stats()
+    manifest_hashes = cm.file_hashes()
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        hashes = dict(zip(required_files, executor.map(file_hash, required_files, repeat(manifest_stats),
+                                                       repeat(manifest_hashes))))
+    changed = dc.changed_files(cache, hashes, key)
+    log.info("%s cache: %s evicted, %s to tokenize, %s cached" % (cache_name, len(stale), len(changed),
+                                                                  len(hashes) - len(changed)))
+    if len(changed) > 0:
+        document_meta, modified_texts = tokenizer(changed, n_process=n_process, batch_size=batch_size,
+                                                  legacy_num_masking=legacy_num_masking)
+        for file_path_ in changed:
+            cache[file_path_] = {"hash": hashes[file_path_], "config": key, "meta": document_meta[file_path_],
+                                 "text": modified_texts.get(file_path_)}
+    if len(changed) > 0 or len(stale) > 0:
+        dc.save_cache(cache, cache_name)
+
+    # merge in the order of required_files, as tokenizer does
     document_meta = dict()
     modified_texts = dict()
-    parsed_documents = dict()
     for file_path_ in required_files:
-        file_path = gv.data_src_path + file_path_
-        lines = fc.read_file(file_path)
-        text = "".join(lines)
-        parsed_text = nlp(text)
-        parsed_documents[file_path_] = parsed_text
-        document_meta[file_path_] = dict()
-        is_empty = True
-        for token in parsed_text:
-            if token.pos_ is "NUM":
-                token_key = "<NUM>"
-                text = text.replace(token.text, token_key).replace("\r\n", "\n").replace("\r", "\n").replace("\n", " ") \
-                    .replace("\t", " ")
-            else:
-                token_key = token.text.strip()
-            if len(token_key) > 0 and token_key not in stopwords_en:
-                document_meta[file_path_][token_key] = 1.0
-                is_empty = False
-        if not is_empty:
-            modified_texts[file_path_] = text
+        document_meta[file_path_] = cache[file_path_]["meta"]
+        if cache[file_path_]["text"] is not None:
+            modified_texts[file_path_] = cache[file_path_]["text"]
     return document_meta, modified_texts
 
 
 def run():
-    # # train labels
+    # # labels from the corpus manifest, the label files are parsed again only when they change
     # label_start = time.time()
-    # log.info(("Get train labels: ", time.localtime(label_start)))
-    # train_paths_by_label, train_labels_by_path = dl.get_labels(
-    #     fc.read_file(gv.data_src_path + gv.train_label_file_name), gv.train_label_file_name)
-    # log.debug("train_paths_by_label: " + str(len(train_paths_by_label)))
+    # log.info(("Get labels: ", time.localtime(label_start)))
+    # cm.refresh()
+    # train_label_paths, train_label_array = cm.label_arrays("train")
+    # test_label_paths, test_label_array = cm.label_arrays("test")
+    # val_label_paths, val_label_array = cm.label_arrays("val")
+    # # int8 translated labels by path, the label artifacts are saved as int8 arrays in the row order of the data
+    # train_labels_by_path = dict(zip(train_label_paths, train_label_array))
+    # test_labels_by_path = dict(zip(test_label_paths, test_label_array))
+    # val_labels_by_path = dict(zip(val_label_paths, val_label_array))
     # log.debug("train_labels_by_path: " + str(len(train_labels_by_path)))
-    # timer.time_executed(label_start, "Get train labels")
-    # # test labels
-    # label_start = time.time()
-    # log.info(("Get test labels: ", time.localtime(label_start)))
-    # test_paths_by_label, test_labels_by_path = dl.get_labels(fc.read_file(gv.data_src_path + gv.test_label_file_name),
-    #                                                          gv.test_label_file_name)
-    # log.debug("test_paths_by_label: " + str(len(test_paths_by_label)))
     # log.debug("test_labels_by_path: " + str(len(test_labels_by_path)))
-    # timer.time_executed(label_start, "Get test labels")
-    #
-    # # val labels
-    # label_start = time.time()
-    # log.info(("Get val labels: ", time.localtime(label_start)))
-    # val_paths_by_label, val_labels_by_path = dl.get_labels(fc.read_file(gv.data_src_path + gv.val_label_file_name),
-    #                                                        gv.val_label_file_name)
-    # log.debug("val_paths_by_label: " + str(len(val_paths_by_label)))
     # log.debug("val_labels_by_path: " + str(len(val_labels_by_path)))
-    # timer.time_executed(label_start, "Get val labels")
+    # timer.time_executed(label_start, "Get labels")
     #
     # # train dataset processing
     # process_start = time.time()
     # log.info(("Process train data: ", time.localtime(process_start)))
-    # train_document_meta, train_modified_texts = tokenizer(required_files=train_labels_by_path)
+    # train_document_meta, train_modified_texts = cached_tokenizer(required_files=train_labels_by_path,
+    #                                                              cache_name="train_documents")
     # log.debug("train_document_meta: " + str(len(train_document_meta)))
     # log.debug("train_modified_texts: " + str(len(train_modified_texts)))
     # timer.time_executed(process_start, "Process train data")
-    # op.save_object(train_document_meta, gv.prj_src_path + "python_objects/train_document_meta")
-    # op.save_object(train_modified_texts, gv.prj_src_path + "python_objects/train_modified_texts")
+    # ars.save("train_document_meta", train_document_meta)
+    # ars.save("train_modified_texts", train_modified_texts)
     #
     # # test dataset processing
     # process_start = time.time()
     # log.info(("Process test data: ", time.localtime(process_start)))
-    # test_document_meta, test_modified_texts = tokenizer(required_files=test_labels_by_path)
+    # test_document_meta, test_modified_texts = cached_tokenizer(required_files=test_labels_by_path,
+    #                                                            cache_name="test_documents")
     # log.debug("test_document_meta: " + str(len(test_document_meta)))
     # log.debug("test_modified_texts: " + str(len(test_modified_texts)))
     # timer.time_executed(process_start, "Process test data")
-    # op.save_object(test_document_meta, gv.prj_src_path + "python_objects/test_document_meta")
-    # op.save_object(test_modified_texts, gv.prj_src_path + "python_objects/test_modified_texts")
+    # ars.save("test_document_meta", test_document_meta)
+    # ars.save("test_modified_texts", test_modified_texts)
     #
     # # val dataset processing
     # process_start = time.time()
     # log.info(("Process val data: ", time.localtime(process_start)))
-    # val_document_meta, val_modified_texts = tokenizer(required_files=val_labels_by_path)
+    # val_document_meta, val_modified_texts = cached_tokenizer(required_files=val_labels_by_path,
+    #                                                          cache_name="val_documents")
     # log.debug("val_document_meta: " + str(len(val_document_meta)))
     # log.debug("val_modified_texts: " + str(len(val_modified_texts)))
     # timer.time_executed(process_start, "Process val data")
-    # op.save_object(val_document_meta, gv.prj_src_path + "python_objects/val_document_meta")
-    # op.save_object(val_modified_texts, gv.prj_src_path + "python_objects/val_modified_texts")
+    # ars.save("val_document_meta", val_document_meta)
+    # ars.save("val_modified_texts", val_modified_texts)
     #
     # # stopwords_en = load_stop_words()
     #
     # # load document meta
-    # train_document_meta = op.load_object(gv.prj_src_path + "python_objects/train_document_meta")
-    # test_document_meta = op.load_object(gv.prj_src_path + "python_objects/test_document_meta")
-    # val_document_meta = op.load_object(gv.prj_src_path + "python_objects/val_document_meta")
+    # train_document_meta = ars.load("train_document_meta")
+    # test_document_meta = ars.load("test_document_meta")
+    # val_document_meta = ars.load("val_document_meta")
     #
     # # dict_vectorizer
     # process_start = time.time()
@@ -215,45 +396,58 @@ def run():
     # train_data_transformed, train_labels, test_data_transformed, test_labels, val_data_transformed, val_labels = \
     #     dict_vectorizer(data_dict=train_document_meta, label_dict=train_labels_by_path,
     #                     test_data_dict=test_document_meta, test_label_dict=test_labels_by_path,
-    #                     val_data_dict=val_document_meta, val_label_dict=val_labels_by_path)
+    #                     val_data_dict=val_document_meta, val_label_dict=val_labels_by_path,
+    #                     vocabulary_name="data_transformed")
     # log.debug("train_labels: " + str(len(train_labels)))
     # log.debug("test_labels: " + str(len(test_labels)))
     # log.debug("val_labels: " + str(len(val_labels)))
     # timer.time_executed(process_start, "Dictvectorizer")
     #
-    # op.save_object(train_data_transformed, gv.prj_src_path + "python_objects/train_data_transformed")
-    # op.save_object(train_labels, gv.prj_src_path + "python_objects/train_labels")
+    # fs.save_features("train_data_transformed", train_data_transformed, compressed=False)
+    # ars.save("train_labels", np.array(train_labels, dtype=np.int8))
     #
-    # op.save_object(test_data_transformed, gv.prj_src_path + "python_objects/test_data_transformed")
-    # op.save_object(test_labels, gv.prj_src_path + "python_objects/test_labels")
+    # fs.save_features("test_data_transformed", test_data_transformed, compressed=False)
+    # ars.save("test_labels", np.array(test_labels, dtype=np.int8))
     #
-    # op.save_object(val_data_transformed, gv.prj_src_path + "python_objects/val_data_transformed")
-    # op.save_object(val_labels, gv.prj_src_path + "python_objects/val_labels")
+    # fs.save_features("val_data_transformed", val_data_transformed, compressed=False)
+    # ars.save("val_labels", np.array(val_labels, dtype=np.int8))
+    #
+    # # streaming alternative to tokenizer + dict_vectorizer, without per-document dicts
+    # process_start = time.time()
+    # log.info(("Hashing vectorizer: ", time.localtime(process_start)))
+    # train_data_hashed, train_labels = hashing_vectorizer(train_labels_by_path, train_labels_by_path)
+    # test_data_hashed, test_labels = hashing_vectorizer(test_labels_by_path, test_labels_by_path)
+    # val_data_hashed, val_labels = hashing_vectorizer(val_labels_by_path, val_labels_by_path)
+    # timer.time_executed(process_start, "Hashing vectorizer")
+    # fs.save_features("train_data_hashed", train_data_hashed, compressed=False)
+    # fs.save_features("test_data_hashed", test_data_hashed, compressed=False)
+    # fs.save_features("val_data_hashed", val_data_hashed, compressed=False)
     #
     # # load modified texts
-    train_modified_texts = op.load_object(gv.prj_src_path + "python_objects/train_modified_texts")
-    # test_modified_texts = op.load_object(gv.prj_src_path + "python_objects/test_modified_texts")
-    # val_modified_texts = op.load_object(gv.prj_src_path + "python_objects/val_modified_texts")
+    train_modified_texts = ars.load("train_modified_texts")
+    # test_modified_texts = ars.load("test_modified_texts")
+    # val_modified_texts = ars.load("val_modified_texts")
     #
     # # generate preprocessed train corpus
     process_start = time.time()
     log.info(("Train corpus: ", time.localtime(process_start)))
     train_corpus_list = [tcd for key, tcd in train_modified_texts.items()]
-    # train_corpus_preprocessed = PreprocessGenerator(train_corpus_list)
     log.info("train_corpus size: " + str(len(train_corpus_list)))
     timer.time_executed(process_start, "Train corpus")
 
     # generate tokens only train corpus
     process_start = time.time()
     log.info(("Train corpus: ", time.localtime(process_start)))
-    train_corpus_tokens_only = PreprocessGenerator(train_corpus_list, tokens_only=True)
+    write_corpus_file(train_corpus_list, corpus_file_name("train"))
+    train_corpus_tokens_only = TokenizedCorpus(corpus_file_name("train"), tokens_only=True)
     timer.time_executed(process_start, "Train corpus")
 
     # # generate tokens only Test corpus
     # process_start = time.time()
     # log.info(("Test corpus: ", time.localtime(process_start)))
     # test_corpus_list = [tcd for key, tcd in test_modified_texts.items()]
-    # test_corpus_tokens_only = PreprocessGenerator(test_corpus_list, tokens_only=True)
+    # write_corpus_file(test_corpus_list, corpus_file_name("test"))
+    # test_corpus_tokens_only = TokenizedCorpus(corpus_file_name("test"), tokens_only=True)
     # log.info("test_corpus size: " + str(len(test_corpus_list)))
     # timer.time_executed(process_start, "Test corpus")
     #
@@ -261,75 +455,70 @@ def run():
     # process_start = time.time()
     # log.info(("Val corpus: ", time.localtime(process_start)))
     # val_corpus_list = [tcd for key, tcd in val_modified_texts.items()]
-    # val_corpus_tokens_only = PreprocessGenerator(val_corpus_list, tokens_only=True)
+    # write_corpus_file(val_corpus_list, corpus_file_name("val"))
+    # val_corpus_tokens_only = TokenizedCorpus(corpus_file_name("val"), tokens_only=True)
     # log.info("val_corpus size: " + str(len(val_corpus_list)))
     # timer.time_executed(process_start, "Val corpus")
     #
     # # generate doc2vec model
     # process_start = time.time()
     # log.info(("Doc2Vec: ", time.localtime(process_start)))
-    # generate_doc2vec_model(train_corpus_preprocessed)
+    # generate_doc2vec_model(corpus_file=corpus_file_name("train"))
     # timer.time_executed(process_start, "Doc2Vec")
     #
-    # # load doc2vec model
-    # model = load_doc2vec_model()
-    #
     # # get train vector from the doc2vec
     # infer_vector_start = time.time()
     # log.info(("Infer vector train: ", time.localtime(process_start)))
-    # train_vector = list(map(model.infer_vector, train_corpus_tokens_only))
+    # train_vector = dvi.infer_vectors(doc2vec_model_file_name(), train_corpus_tokens_only,
+    #                                  vs.vector_file_name("train_vector"), len(train_corpus_list))
     # log.info("train_vector size: " + str(len(train_vector)))
     # rand_index = randrange(len(train_vector))
     # log.info("train_vector[" + str(rand_index) + "] feature size: " + str(len(train_vector[rand_index - 1])))
     # log.info(train_vector[rand_index])
     # timer.time_executed(infer_vector_start, "Infer vector train")
-    # op.save_object(train_vector, gv.prj_src_path + "python_objects/train_vector")
+    # vs.save_vectors("train_vector", train_vector)
+    # train_vector_paths = corpus_paths(train_modified_texts)
+    # vs.save_index("train_vector", train_vector_paths, [train_labels_by_path[p] for p in train_vector_paths])
     #
     # # get test vector from the doc2vec
     # infer_vector_start = time.time()
     # log.info(("Infer vector test: ", time.localtime(process_start)))
-    # test_vector = list(map(model.infer_vector, test_corpus_tokens_only))
+    # test_vector = dvi.infer_vectors(doc2vec_model_file_name(), test_corpus_tokens_only,
+    #                                 vs.vector_file_name("test_vector"), len(test_corpus_list))
     # log.info("test_vector size: " + str(len(test_vector)))
     # rand_index = randrange(len(test_vector))
     # log.info("test_vector[" + str(rand_index) + "] feature size: " + str(len(test_vector[rand_index - 1])))
     # log.info(test_vector[rand_index])
     # timer.time_executed(infer_vector_start, "Infer vector test")
-    # op.save_object(test_vector, gv.prj_src_path + "python_objects/test_vector")
+    # vs.save_vectors("test_vector", test_vector)
+    # test_vector_paths = corpus_paths(test_modified_texts)
+    # vs.save_index("test_vector", test_vector_paths, [test_labels_by_path[p] for p in test_vector_paths])
     #
     # # get val vector from the doc2vec
     # infer_vector_start = time.time()
     # log.info(("Infer vector val: ", time.localtime(process_start)))
-    # val_vector = list(map(model.infer_vector, val_corpus_tokens_only))
+    # val_vector = dvi.infer_vectors(doc2vec_model_file_name(), val_corpus_tokens_only,
+    #                                vs.vector_file_name("val_vector"), len(val_corpus_list))
     # log.info("val_vector size: " + str(len(val_vector)))
     # rand_index = randrange(len(val_vector))
     # log.info("val_vector[" + str(rand_index) + "] feature size: " + str(len(val_vector[rand_index - 1])))
     # log.info(val_vector[rand_index])
     # timer.time_executed(infer_vector_start, "Infer vector val")
-    # op.save_object(val_vector, gv.prj_src_path + "python_objects/val_vector")
+    # vs.save_vectors("val_vector", val_vector)
+    # val_vector_paths = corpus_paths(val_modified_texts)
+    # vs.save_index("val_vector", val_vector_paths, [val_labels_by_path[p] for p in val_vector_paths])
 
     # preprocess for lda
     process_start = time.time()
     log.info(("Preprocess LDA: ", time.localtime(process_start)))
-    corpus, dictionary = preprocess_for_lda(train_corpus_tokens_only)
+    preprocess_for_lda(train_corpus_tokens_only)
     timer.time_executed(process_start, "Preprocess LDA")
 
-    dictionary = load_lda_dictionary("dataset")
-    corpus = op.load_object(gv.prj_src_path + "python_objects/corpus")
     # generate lda models
     process_start = time.time()
-    log.info(("LDA_20_20: ", time.localtime(process_start)))
-    generate_lda_model(corpus, dictionary, num_topics=20, passes=20)
-    timer.time_executed(process_start, "LDA_20_20")
-
-    process_start = time.time()
-    log.info(("LDA_50_10: ", time.localtime(process_start)))
-    generate_lda_model(corpus, dictionary, num_topics=50, passes=10)
-    timer.time_executed(process_start, "LDA_50_10")
-
-    process_start = time.time()
-    log.info(("LDA_30_20: ", time.localtime(process_start)))
-    generate_lda_model(corpus, dictionary, num_topics=30, passes=20)
-    timer.time_executed(process_start, "LDA_30_20")
+    log.info(("LDA grid: ", time.localtime(process_start)))
+    generate_lda_models("corpus", "dataset", [(20, 20), (50, 10), (30, 20)])
+    timer.time_executed(process_start, "LDA grid")
 
 
 def main():
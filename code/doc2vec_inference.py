@@ -0,0 +1,98 @@
+import logging as log
+import multiprocessing
+import os
+import zlib
+from collections import deque
+from itertools import islice
+
+import numpy as np
+from gensim.models.doc2vec import Doc2Vec
+
+worker_model = None
+worker_vectors = None
+worker_seed = None
+
+
+def stable_hash(seed_string):
+    return zlib.crc32(seed_string.encode("utf-8"))
+
+
+def load_model(model_file_name, seed=None):
+    # arrays saved separately by Doc2Vec.save are memory-mapped, so every worker shares the same pages
+    model = Doc2Vec.load(model_file_name, mmap='r')
+    if seed is not None:
+        # hash() is salted per process, the initial document vector has to be seeded the same way everywhere
+        model.trainables.hashfxn = stable_hash
+    return model
+
+
+def infer_document(model, tokens, index, seed=None):
+    if seed is not None:
+        model.random = np.random.RandomState(seed + index)
+    return model.infer_vector(tokens)
+
+
+def init_worker(model_file_name, vector_file_name, seed):
+    global worker_model, worker_vectors, worker_seed
+    worker_model = load_model(model_file_name, seed)
+    worker_vectors = np.load(vector_file_name, mmap_mode='r+')
+    worker_seed = seed
+
+
+def infer_batch(batch):
+    start, documents = batch
+    for offset, tokens in enumerate(documents):
+        worker_vectors[start + offset] = infer_document(worker_model, tokens, start + offset, worker_seed)
+    worker_vectors.flush()
+    return len(documents)
+
+
+def batches(corpus_tokens, batch_size):
+    iterator = iter(corpus_tokens)
+    start = 0
+    while True:
+        documents = list(islice(iterator, batch_size))
+        if len(documents) == 0:
+            return
+        yield start, documents
+        start += len(documents)
+
+
+def infer_vectors(model_file_name, corpus_tokens, vector_file_name, n_documents, n_workers=None, batch_size=256,
+                  seed=0, max_pending=None):
+    # n_documents comes from the caller, counting corpus_tokens would tokenize the whole corpus once more
+    if n_workers is None:
+        n_workers = multiprocessing.cpu_count()
+    vector_size = load_model(model_file_name).docvecs.vector_size
+
+    # preallocate the float32 result matrix next to vector_file_name, workers write their rows straight into it;
+    # it is renamed over vector_file_name only once every row is inferred, an interrupted run leaves no vectors
+    partial_file_name = vector_file_name + ".partial"
+    vectors = np.lib.format.open_memmap(partial_file_name, mode='w+', dtype=np.float32,
+                                        shape=(n_documents, vector_size))
+    del vectors
+    log.info("infer %s vectors of size %s with %s workers" % (n_documents, vector_size, n_workers))
+    inferred = 0
+    try:
+        with multiprocessing.Pool(n_workers, initializer=init_worker,
+                                  initargs=(model_file_name, partial_file_name, seed)) as pool:
+            # imap would drain the batches generator up front, only max_pending batches are queued at a time
+            if max_pending is None:
+                max_pending = 2 * n_workers
+            pending = deque()
+            for batch in batches(corpus_tokens, batch_size):
+                pending.append(pool.apply_async(infer_batch, (batch,)))
+                if len(pending) >= max_pending:
+                    inferred += pending.popleft().get()
+                    log.debug("inferred %s/%s vectors" % (inferred, n_documents))
+            while pending:
+                inferred += pending.popleft().get()
+                log.debug("inferred %s/%s vectors" % (inferred, n_documents))
+        if inferred != n_documents:
+            raise ValueError("%s documents in the corpus, %s expected" % (inferred, n_documents))
+        os.replace(partial_file_name, vector_file_name)
+    except BaseException:
+        if os.path.exists(partial_file_name):
+            os.remove(partial_file_name)
+        raise
+    return np.load(vector_file_name, mmap_mode='r')
@@ -0,0 +1,49 @@
+import hashlib
+import json
+import logging as log
+
+import global_variables as gv
+import object_pickler as op
+
+
+def content_hash(file_path):
+    sha = hashlib.sha1()
+    try:
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+    except Exception as ex:
+        log.warning(("Error hash file: ", file_path))
+        log.error(ex)
+        return None
+    return sha.hexdigest()
+
+
+def config_key(config):
+    return hashlib.sha1(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cache_file_name(cache_name):
+    return "%spython_objects/%s_cache" % (gv.prj_src_path, cache_name)
+
+
+def load_cache(cache_name):
+    return op.load_object(cache_file_name(cache_name))
+
+
+def save_cache(cache, cache_name):
+    op.save_object(cache, cache_file_name(cache_name))
+
+
+def evict_stale(cache, required_files):
+    # drop entries for files that are no longer listed in the label file
+    required_files = set(required_files)
+    stale = [file_path_ for file_path_ in cache if file_path_ not in required_files]
+    for file_path_ in stale:
+        del cache[file_path_]
+    return stale
+
+
+def changed_files(cache, hashes, key):
+    return [file_path_ for file_path_, content in hashes.items()
+            if file_path_ not in cache or cache[file_path_]["hash"] != content or cache[file_path_]["config"] != key]
@@ -1,23 +1,87 @@
+import json
 import logging as log
 import time
 
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
 from sklearn import svm
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.kernel_approximation import Nystroem
 from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import make_pipeline
 
+import artifact_store as ars
+import clustering as clu
+import feature_store as fs
 import global_variables as gv
-import object_pickler as op
+import model_store as ms
 import timer
+import vector_store as vs
+from data_labeller import as_translated
 
 log.basicConfig(filename='document_clustering.log', level=log.DEBUG, filemode="w")
 
 
-def load_pickle(filename):
-    # filename without extension
-    return op.load_object(gv.prj_src_path + "python_objects/" + filename)
+def load_artifact(filename):
+    # filename without extension, old .p pickles are still read
+    return ars.load(filename)
 
 
-def train_test():
+def load_data(filename):
+    # doc2vec vectors and dictvectorizer features are memory-mapped from their stores
+    if vs.exists(filename):
+        return vs.load_vectors(filename)
+    if fs.exists(filename):
+        return fs.load_features(filename)
+    return load_artifact(filename)
+
+
+def has_negative_values(data):
+    if sparse.issparse(data):
+        return data.data.min() < 0 if data.nnz > 0 else False
+    return data.min() < 0
+
+
+def iter_chunks(data, chunk_size):
+    # only one chunk of rows is copied out of the memory-mapped store at a time
+    for start in range(0, data.shape[0], chunk_size):
+        yield start, data[start:start + chunk_size]
+
+
+def partial_fit_batches(clf, data, labels=None, batch_size=10000, epochs=5, random_state=0):
+    # labels=None for clustering estimators
+    classes = None if labels is None else np.unique(labels)
+    batch_starts = np.arange(0, data.shape[0], batch_size)
+    random = np.random.RandomState(random_state)
+    for epoch in range(epochs):
+        for start in random.permutation(batch_starts):
+            if labels is None:
+                clf.partial_fit(data[start:start + batch_size])
+            else:
+                clf.partial_fit(data[start:start + batch_size], labels[start:start + batch_size], classes=classes)
+    return clf
+
+
+def predict_in_chunks(clf, data, chunk_size=10000):
+    return np.concatenate([clf.predict(chunk) for _, chunk in iter_chunks(data, chunk_size)])
+
+
+def fit_predict(clf, data, labels, test_data, incremental=False):
+    fit_start = time.time()
+    if incremental:
+        partial_fit_batches(clf, data, labels)
+    else:
+        clf.fit(data, labels)
+    fit_seconds = time.time() - fit_start
+    predict_start = time.time()
+    predict = clf.predict(test_data)
+    return clf, predict, fit_seconds, time.time() - predict_start
+
+
+def train_test(n_jobs=-1):
     data_label = [{"data": "train_vector", "label": "train_labels",
                    "test_data": "test_vector", "test_label": "test_labels"}
                   # ,
@@ -30,33 +94,114 @@ def train_test():
                        "SVC_poly": svm.SVC(kernel='poly', C=1, random_state=0),
                        "SVC_rbf": svm.SVC(kernel='rbf', C=1, random_state=0),
                        "LogisticRegression": LogisticRegression()},
-        "unsupervised": {"KMeans": KMeans(n_clusters=15)}
+        # linear time in the number of documents, for large sparse features
+        "fast_supervised": {"LinearSVC": svm.LinearSVC(C=1, random_state=0),
+                            "SGDClassifier": SGDClassifier(loss='hinge', random_state=0),
+                            "Nystroem_rbf": make_pipeline(Nystroem(kernel='rbf', n_components=1000, random_state=0),
+                                                          svm.LinearSVC(C=1, random_state=0)),
+                            "MultinomialNB": MultinomialNB()},
+        "unsupervised": {"KMeans": KMeans(n_clusters=15),
+                         "MiniBatchKMeans": clu.make_clusterer("minibatch", n_clusters=15),
+                         "SphericalKMeans": clu.make_clusterer("spherical", n_clusters=15)}
     }
+    # trained with partial_fit over mini-batches
+    incremental_algorithms = {"SGDClassifier"}
+    # MultinomialNB only accepts counts, doc2vec vectors have negative components
+    non_negative_algorithms = {"MultinomialNB"}
+    results = list()
     for dl in data_label:
-        data = load_pickle(dl["data"])
-        test_data = load_pickle(dl["test_data"])
-        labels = load_pickle(dl["label"])
-        labels = [gv.translation[x] for x in labels]
+        data = load_data(dl["data"])
+        test_data = load_data(dl["test_data"])
+        labels = load_artifact(dl["label"])
+        labels = as_translated(labels)
+
+        negative_values = has_negative_values(data)
+        jobs = [(s_u, algo, clf) for s_u, algos in try_algorithms.items() for algo, clf in algos.items()
+                if not (negative_values and algo in non_negative_algorithms)]
+        zoo_time = time.time()
+        log.info("%s: %s models on %s jobs starts at %s" % (dl["data"], len(jobs), n_jobs, time.localtime(zoo_time)))
+        # read-only matrices over 1M are handed to the workers as memmaps instead of being pickled per worker
+        fitted = Parallel(n_jobs=n_jobs, max_nbytes='1M', mmap_mode='r')(
+            delayed(fit_predict)(clf, data, labels, test_data, incremental=algo in incremental_algorithms)
+            for s_u, algo, clf in jobs)
+        timer.time_executed(zoo_time, "%s models" % dl["data"])
+
+        # the vectorizer files are hashed once for every model trained on this data
+        features = ms.features_of(dl["data"])
+        dependency = ms.dependency_hash(features)
+        for (s_u, algo, _), (clf, predict, fit_seconds, predict_seconds) in zip(jobs, fitted):
+            log.info("%s Algorithm: %s" % (s_u, algo))
+            timer.log_duration(fit_seconds, "\t\ttraining")
+            timer.log_duration(predict_seconds, "\t\tpredict")
+            ars.save("%s_%s_predict" % (algo, dl["test_data"]), predict)
+            ms.save_model("%s_%s" % (algo, dl["data"]), clf, features, s_u, data.shape[1], dependency)
+            results.append({"data": dl["data"], "test_data": dl["test_data"], "type": s_u, "algorithm": algo,
+                            "fit_seconds": fit_seconds, "predict_seconds": predict_seconds})
+            if s_u == "unsupervised":
+                results[-1]["inertia"] = clu.inertia(clf)
+
+    with open(gv.prj_src_path + "python_objects/train_test_results.json", "wt", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+
+def train_test_streaming(chunk_size=10000, epochs=5):
+    # out-of-core variant of train_test, memory is bounded by chunk_size rows instead of the training set
+    data_label = [{"data": "train_vector", "label": "train_labels",
+                   "test_data": "test_vector", "test_label": "test_labels"}
+                  # ,
+                  #           {"data": "train_data_transformed", "label": "train_labels",
+                  #            "test_data": "test_data_transformed", "test_label": "test_labels"}
+                  ]
 
-        for s_u, algos in try_algorithms.items():
-            s_u_time = time.time()
-            log.info("%s  starts at %s" % (s_u, time.localtime(s_u_time)))
+    streaming_algorithms = {
+        "supervised": {"SGDClassifier": SGDClassifier(loss='hinge', random_state=0),
+                       "MultinomialNB": MultinomialNB()},
+        "unsupervised": {"MiniBatchKMeans": MiniBatchKMeans(n_clusters=15, random_state=0)}
+    }
+    non_negative_algorithms = {"MultinomialNB"}
+    # partial_fit of naive Bayes accumulates counts, a second pass would double them instead of refining the model
+    single_pass_algorithms = {"MultinomialNB"}
+    for dl in data_label:
+        data = load_data(dl["data"])
+        test_data = load_data(dl["test_data"])
+        labels = load_artifact(dl["label"])
+        labels = as_translated(labels)
+        negative_values = has_negative_values(data)
 
+        for s_u, algos in streaming_algorithms.items():
             for algo, clf in algos.items():
+                if negative_values and algo in non_negative_algorithms:
+                    continue
                 algo_time = time.time()
-                log.info("\tAlgorithm: %s \n\t\ttraining starts at %s" % (algo, time.localtime(algo_time)))
-                clf.fit(data, labels)
+                log.info("\tAlgorithm: %s (streaming)\n\t\ttraining starts at %s" % (algo, time.localtime(algo_time)))
+                partial_fit_batches(clf, data, labels if s_u == "supervised" else None, batch_size=chunk_size,
+                                    epochs=1 if algo in single_pass_algorithms else epochs)
                 timer.time_executed(algo_time, "\t\ttraining")
 
                 predict_time = time.time()
                 log.info("\t\t%s predict starts at %s" % (algo, time.localtime(predict_time)))
-                predict = clf.predict(test_data)
+                predict = predict_in_chunks(clf, test_data, chunk_size)
                 timer.time_executed(predict_time, "\t\tpredict")
-                op.save_object(predict, gv.prj_src_path + "python_objects/%s_%s_predict" % (algo, dl["test_data"]))
+                ars.save("%s_streaming_%s_predict" % (algo, dl["test_data"]), predict)
+
+
+def clustering_sweep(data_name="train_vector", label_name="train_labels", n_clusters_list=range(5, 35, 5),
+                     methods=("minibatch", "spherical"), n_jobs=-1):
+    data = load_data(data_name)
+    labels = as_translated(load_artifact(label_name))
+    sweep_time = time.time()
+    log.info("clustering sweep on %s starts at %s" % (data_name, time.localtime(sweep_time)))
+    results = clu.sweep_k(data, n_clusters_list, methods=methods, labels=labels, n_jobs=n_jobs)
+    timer.time_executed(sweep_time, "clustering sweep")
+    with open(gv.prj_src_path + "python_objects/%s_clustering_sweep.json" % data_name, "wt", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return results
 
 
 def run():
     train_test()
+    # train_test_streaming()
+    # clustering_sweep()
 
 
 def main():
@@ -0,0 +1,105 @@
+import json
+import re
+
+import spacy
+
+import file_collector as fc
+import global_variables as gv
+
+whitespace_pattern = re.compile(r"\r\n|[\r\n\t]")
+spacy_model = "en_core_web_sm"
+# only the tagger is needed for token.pos_
+spacy_disable = ["parser", "ner"]
+
+
+def load_stop_words():
+    with open(stop_words_file_name(), "rt", encoding="utf-8-sig") as infile:
+        stopwords_en = json.load(infile)["en"]
+        return stopwords_en
+
+
+def stop_words_file_name():
+    return gv.prj_src_path + "data/stopwords-en.txt"
+
+
+def spacy_model_version():
+    # nlp.meta["version"] of the installed model package, read without loading the pipeline
+    return spacy.util.get_model_meta(spacy.util.get_package_path(spacy_model))["version"]
+
+
+def read_texts(required_files, src_path=None, n_threads=8):
+    # files are read ahead on threads while spaCy parses the previous batch
+    if src_path is None:
+        src_path = gv.data_src_path
+    required_files = list(required_files)
+    texts = fc.read_texts([src_path + file_path_ for file_path_ in required_files], n_threads=n_threads)
+    for text, file_path_ in zip(texts, required_files):
+        yield text, file_path_
+
+
+def normalize_whitespace(text):
+    return whitespace_pattern.sub(" ", text)
+
+
+def mask_numbers(parsed_text):
+    # rebuild the text from token offsets, replacing NUM tokens in a single pass
+    pieces = list()
+    masked = False
+    for token in parsed_text:
+        if token.pos_ == "NUM":
+            pieces.append("<NUM>")
+            masked = True
+        else:
+            pieces.append(token.text)
+        pieces.append(token.whitespace_)
+    text = "".join(pieces)
+    if masked:
+        text = normalize_whitespace(text)
+    return text
+
+
+def mask_numbers_legacy(parsed_text):
+    # substring replace over the whole document for every NUM token, kept to diff against mask_numbers
+    text = parsed_text.text
+    for token in parsed_text:
+        if token.pos_ == "NUM":
+            text = text.replace(token.text, "<NUM>").replace("\r\n", "\n").replace("\r", "\n").replace("\n", " ") \
+                .replace("\t", " ")
+    return text
+
+
+def tokenize_documents(required_files, n_process=1, batch_size=1000, legacy_num_masking=False, mask_texts=True,
+                       src_path=None):
+    # yields (file path, unique token keys in order of appearance, modified text or None if empty)
+    stopwords_en = set(load_stop_words())
+    mask = mask_numbers_legacy if legacy_num_masking else mask_numbers
+
+    nlp = spacy.load(spacy_model, disable=spacy_disable)
+    for parsed_text, file_path_ in nlp.pipe(read_texts(required_files, src_path), as_tuples=True, n_process=n_process,
+                                            batch_size=batch_size):
+        token_keys = list()
+        seen = set()
+        for token in parsed_text:
+            if token.pos_ == "NUM":
+                token_key = "<NUM>"
+            else:
+                token_key = token.text.strip()
+            if len(token_key) > 0 and token_key not in stopwords_en and token_key not in seen:
+                seen.add(token_key)
+                token_keys.append(token_key)
+        text = None
+        if len(token_keys) > 0 and mask_texts:
+            text = mask(parsed_text)
+        yield file_path_, token_keys, text
+
+
+def tokenizer(required_files, n_process=1, batch_size=1000, legacy_num_masking=False):
+    document_meta = dict()
+    modified_texts = dict()
+    for file_path_, token_keys, text in tokenize_documents(required_files, n_process=n_process,
+                                                           batch_size=batch_size,
+                                                           legacy_num_masking=legacy_num_masking):
+        document_meta[file_path_] = dict.fromkeys(token_keys, 1.0)
+        if text is not None:
+            modified_texts[file_path_] = text
+    return document_meta, modified_texts
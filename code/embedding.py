@@ -0,0 +1,71 @@
+import hashlib
+import logging as log
+import os
+import time
+
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import PCA
+from sklearn.decomposition import TruncatedSVD
+from sklearn.manifold import TSNE
+
+import global_variables as gv
+import timer
+
+
+def matrix_hash(matrix):
+    sha = hashlib.sha1()
+    sha.update(("%s %s" % (matrix.shape, matrix.dtype)).encode("utf-8"))
+    if sparse.issparse(matrix):
+        matrix = sparse.csr_matrix(matrix)
+        arrays = [matrix.data, matrix.indices, matrix.indptr]
+    else:
+        arrays = [matrix]
+    for array in arrays:
+        sha.update(np.ascontiguousarray(array).data)
+    return sha.hexdigest()
+
+
+def embedding_file_name(matrix_key, method, reduce_components, random_state):
+    return "%spython_objects/embedding_%s_%s_%s_%s.npy" % (gv.prj_src_path, method, reduce_components, random_state,
+                                                           matrix_key)
+
+
+def reduce_dimensions(matrix, n_components, random_state):
+    # sparse input is never densified, TruncatedSVD works on CSR directly
+    if sparse.issparse(matrix):
+        return TruncatedSVD(n_components=n_components, random_state=random_state).fit_transform(matrix)
+    return PCA(n_components=n_components, random_state=random_state).fit_transform(matrix)
+
+
+def fit_embedding(matrix, method, n_jobs, random_state):
+    if method == "tsne":
+        return TSNE(n_components=2, method="barnes_hut", init="pca", random_state=random_state,
+                    n_jobs=n_jobs).fit_transform(matrix)
+    if method == "opentsne":
+        from openTSNE import TSNE as OpenTSNE
+        return np.asarray(OpenTSNE(n_components=2, initialization="pca", n_jobs=n_jobs,
+                                   random_state=random_state).fit(matrix))
+    if method == "umap":
+        import umap
+        return umap.UMAP(n_components=2, random_state=random_state).fit_transform(matrix)
+    if method == "pca":
+        return reduce_dimensions(matrix, 2, random_state)
+    raise ValueError("unknown embedding method: %s" % method)
+
+
+def embed_2d(matrix, method="tsne", reduce_components=50, n_jobs=-1, random_state=0):
+    # 2-d coordinates are cached by the hash of the input matrix, a repeated plot never recomputes them
+    file_name = embedding_file_name(matrix_hash(matrix), method, reduce_components, random_state)
+    if os.path.exists(file_name):
+        log.info("embedding cache hit: " + file_name)
+        return np.load(file_name)
+
+    embedding_start = time.time()
+    log.info("embedding %s with %s: %s" % (matrix.shape, method, time.localtime(embedding_start)))
+    if method != "pca" and (sparse.issparse(matrix) or matrix.shape[1] > reduce_components):
+        matrix = reduce_dimensions(matrix, reduce_components, random_state)
+    embedded = fit_embedding(matrix, method, n_jobs, random_state).astype(np.float32)
+    timer.time_executed(embedding_start, "embedding " + method)
+    np.save(file_name, embedded)
+    return embedded
@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction import DictVectorizer
+
+import global_variables as gv
+from object_pickler import atomic_open
+from object_pickler import umask
+
+
+def feature_file_name(name):
+    return "%spython_objects/%s" % (gv.prj_src_path, name)
+
+
+def vocabulary_file_name(name):
+    return "%spython_objects/%s_vocabulary.json" % (gv.prj_src_path, name)
+
+
+def exists(name):
+    return os.path.exists(feature_file_name(name) + ".npz") or os.path.isdir(feature_file_name(name))
+
+
+def save_features(name, matrix, compressed=True):
+    # the matrix replaces the one saved in the other format, load_features would prefer a stale directory
+    matrix = sparse.csr_matrix(matrix)
+    if compressed:
+        with atomic_open(feature_file_name(name) + ".npz") as f:
+            sparse.save_npz(f, matrix, compressed=True)
+        if os.path.isdir(feature_file_name(name)):
+            shutil.rmtree(feature_file_name(name))
+        return
+    # uncompressed data/indices/indptr arrays can be memory-mapped on load; they are written to a temporary
+    # directory renamed into place, an interrupted write never mixes the arrays of two matrices
+    temp_dir = tempfile.mkdtemp(dir=os.path.dirname(feature_file_name(name)), prefix="." + name)
+    # a directory cannot be renamed over a non-empty one, the previous arrays are moved aside first
+    old_dir = tempfile.mkdtemp(dir=os.path.dirname(feature_file_name(name)), prefix="." + name)
+    try:
+        for array_name, array in [("data", matrix.data), ("indices", matrix.indices), ("indptr", matrix.indptr),
+                                  ("shape", np.array(matrix.shape))]:
+            with atomic_open(os.path.join(temp_dir, array_name + ".npy")) as f:
+                np.save(f, array)
+        os.chmod(temp_dir, 0o777 & ~umask)
+        if os.path.isdir(feature_file_name(name)):
+            os.replace(feature_file_name(name), os.path.join(old_dir, name))
+        os.replace(temp_dir, feature_file_name(name))
+    except BaseException:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        if os.path.isdir(os.path.join(old_dir, name)) and not os.path.isdir(feature_file_name(name)):
+            os.replace(os.path.join(old_dir, name), feature_file_name(name))
+        raise
+    finally:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(feature_file_name(name) + ".npz"):
+        os.remove(feature_file_name(name) + ".npz")
+
+
+def load_features(name, mmap_mode='r'):
+    if os.path.isdir(feature_file_name(name)):
+        arrays = dict((array_name, np.load(os.path.join(feature_file_name(name), array_name + ".npy"),
+                                           mmap_mode=mmap_mode, allow_pickle=False))
+                      for array_name in ["data", "indices", "indptr", "shape"])
+        return sparse.csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]),
+                                 shape=tuple(int(n) for n in arrays["shape"]), copy=False)
+    return sparse.load_npz(feature_file_name(name) + ".npz")
+
+
+def save_vocabulary(name, vectorizer):
+    with atomic_open(vocabulary_file_name(name), "wt", encoding="utf-8") as f:
+        json.dump({"feature_names": vectorizer.feature_names_, "separator": vectorizer.separator}, f)
+
+
+def load_vectorizer(name):
+    # a fitted DictVectorizer that transforms new documents into the saved feature space
+    with open(vocabulary_file_name(name), "rt", encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    vectorizer = DictVectorizer(separator=vocabulary["separator"], sparse=True)
+    vectorizer.feature_names_ = vocabulary["feature_names"]
+    vectorizer.vocabulary_ = dict((feature, index) for index, feature in enumerate(vectorizer.feature_names_))
+    return vectorizer
@@ -1,23 +1,74 @@
+import codecs
+import io
 import os
 import logging as log
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import corpus_shards as cs
 import global_variables as gv
 
 
-def read_file(file_name):
-    # global error_file_count
-    lines = []
+def latin_1_fallback(error):
+    # bytes that are not valid utf-8 are decoded as latin-1 instead of failing the whole file
+    return error.object[error.start:error.end].decode("latin-1"), error.end
+
+
+codecs.register_error("latin-1-fallback", latin_1_fallback)
+
+# read_text and iter_text_chunks run on the prefetch threads of read_texts and the threads of their callers
+error_file_count_lock = threading.Lock()
+
+
+def open_text(file_name, errors):
+    # files of the corpus directory are served from the packed shards unless they changed since the pack
+    data = cs.read_bytes(file_name[len(gv.data_src_path):]) if file_name.startswith(gv.data_src_path) else None
+    if data is not None:
+        return io.TextIOWrapper(io.BytesIO(data), encoding="utf-8", errors=errors)
+    return open(file_name, 'rt', encoding="utf-8", errors=errors)
+
+
+def read_text(file_name, errors="latin-1-fallback"):
+    # whole file in one read(), newlines translated like readlines() did; errors="replace" for U+FFFD instead
+    try:
+        with open_text(file_name, errors) as f:
+            return f.read()
+    except Exception as ex:
+        with error_file_count_lock:
+            gv.error_file_count += 1
+        log.warning(("Error file: ", file_name))
+        log.error(ex)
+    return ""
+
+
+def iter_text_chunks(file_name, chunk_size=1 << 20, errors="latin-1-fallback"):
+    # for files too large to hold at once, multi-byte characters split across chunks are decoded correctly
     try:
-        with open(file_name, 'rt', encoding="utf-8") as f:
-            try:
-                lines = f.readlines()
-            except Exception as e:
-                gv.error_file_count += 1
-                log.warning(("Error file: ", file_name))
-                log.error(e)
+        with open_text(file_name, errors) as f:
+            for chunk in iter(lambda: f.read(chunk_size), ""):
+                yield chunk
     except Exception as ex:
+        with error_file_count_lock:
+            gv.error_file_count += 1
         log.warning(("Error file: ", file_name))
         log.error(ex)
-    return lines
+
+
+def read_texts(file_names, n_threads=8, prefetch=64, errors="latin-1-fallback"):
+    # texts in the order of file_names, at most prefetch files are read ahead by the thread pool
+    with ThreadPoolExecutor(max_workers=n_threads) as executor:
+        pending = deque()
+        for file_name in file_names:
+            pending.append(executor.submit(read_text, file_name, errors))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def read_file(file_name):
+    return io.StringIO(read_text(file_name)).readlines()
 
 
 def get_all_files_from_directory(dir_path):
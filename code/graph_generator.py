@@ -1,21 +1,28 @@
 import logging as log
+import multiprocessing
+
+import matplotlib
+
+# headless backend, charts are only written to files (and rendered in worker processes)
+matplotlib.use("Agg")
+
 import seaborn as sns
 import matplotlib.pyplot as plt
 
 
-def plot_chart(y, y_label, title, kind, data, pad, plot_name, fig_num):
-    plt.figure(fig_num)
-    plt.title(title, pad=pad)
+def plot_chart(y, y_label, title, kind, data, pad, plot_name):
     sns_plot = sns.catplot(x="label", y=y, kind=kind, data=data)
+    sns_plot.ax.set_title(title, pad=pad)
     sns_plot.set_xticklabels(rotation=45, ha='right')
     sns_plot.set_axis_labels("Classes", y_label)
     for index, row in data.iterrows():
         sns_plot.ax.text(float(index) - 0.25, row[y], row[y], rotation=45)
     sns_plot.savefig(plot_name + ".png")
+    plt.close(sns_plot.fig)
     # plt.show()
 
 
-def plot_cluster(title, data, pad, plot_name, fig_num, l_col, hue):
+def plot_cluster(title, data, pad, plot_name, fig_num, l_col, hue, max_points=None):
     palette = ["#273eff", "#f37c04", "#4bc938", "#e82007", "#8b2be2", "#9f4700", "#f24cc1", "#a3a3a3", "#f7c401",
                "#56d8fe", "#cd88a8", "#5ea55a", "#f15357", "#2d70b1", "#000200"]
     classes = data[hue].unique()
@@ -23,11 +30,30 @@ def plot_cluster(title, data, pad, plot_name, fig_num, l_col, hue):
     log.debug(title + "num_classes:" + str(num_classes))
     log.debug(title + "classes:")
     log.debug(classes)
-    plt.figure(num=fig_num, figsize=(15, 15))
+    if max_points is not None and data.shape[0] > max_points:
+        # fast path for large scatter plots, a uniform sample keeps the class mixture
+        data = data.sample(n=max_points, random_state=0)
+    figure = plt.figure(num=fig_num, figsize=(15, 15))
     plt.title(title, pad=pad)
+    # points are drawn into one raster image instead of one vector path each
     sns_plot = sns.scatterplot(x="x", y="y", hue=hue, palette=sns.color_palette(palette), data=data,
-                               legend="full")
+                               legend="full", rasterized=True)
     plt.legend(loc='upper left', bbox_to_anchor=(0.57, 1.13),
                ncol=l_col, fancybox=True, shadow=True)
     sns_plot.figure.savefig(plot_name + ".png")
+    plt.close(figure)
     # plt.show()
+
+
+def render_chart(chart):
+    plot_function, kwargs = chart
+    plot_function(**kwargs)
+    return kwargs["plot_name"]
+
+
+def render_charts(charts, n_jobs=None):
+    # charts are (plot_chart or plot_cluster, kwargs) tuples, independent of each other; the module-level
+    # functions are pickled by reference
+    with multiprocessing.Pool(n_jobs) as pool:
+        for plot_name in pool.imap_unordered(render_chart, charts):
+            log.debug("rendered: " + plot_name)
@@ -2,12 +2,12 @@ import logging as log
 import time
 
 import pyLDAvis
-from gensim.corpora import Dictionary
+from gensim.corpora import Dictionary, MmCorpus
 from gensim.models import LdaModel, CoherenceModel
 from scipy.sparse import csr as _csr
 
+import artifact_store as ars
 import global_variables as gv
-import object_pickler as op
 import timer
 
 log.basicConfig(filename='ldavis.log', level=log.DEBUG, filemode="w")
@@ -21,9 +21,11 @@ def load_lda_dictionary(dict_name):
     return Dictionary.load_from_text("%spython_objects/%s.dict" % (gv.prj_src_path, dict_name))
 
 
-def visualize(corpus, dictionary, num_topics_passes_tuple_list):
-    texts = corpus
-    corpus = list(map(dictionary.doc2bow, corpus))
+def load_lda_corpus(corpus_name):
+    return MmCorpus("%spython_objects/%s.mm" % (gv.prj_src_path, corpus_name))
+
+
+def visualize(texts, corpus, dictionary, num_topics_passes_tuple_list):
     model_list = dict()
     for num_topics_passes_tuple in num_topics_passes_tuple_list:
         model_list["%s_%s" % (str(num_topics_passes_tuple[0]), str(num_topics_passes_tuple[1]))] = load_lda_model(
@@ -55,12 +57,15 @@ def process_data(modified_texts):
 
 
 def main():
-    train_modified_texts = op.load_object(gv.prj_src_path + "python_objects/train_modified_texts")
+    train_modified_texts = ars.load("train_modified_texts")
     dictionary = load_lda_dictionary("dataset")
-    corpus = process_data(train_modified_texts)
+    texts = process_data(train_modified_texts)
+    # the bag-of-words corpus the models were trained on, streamed from disk
+    corpus = load_lda_corpus("corpus")
     num_topics_passes_tuple_list = [(20, 20), (50, 10), (30, 20)]
 
-    visualize(corpus=corpus, dictionary=dictionary, num_topics_passes_tuple_list=num_topics_passes_tuple_list)
+    visualize(texts=texts, corpus=corpus, dictionary=dictionary,
+              num_topics_passes_tuple_list=num_topics_passes_tuple_list)
 
 
 if __name__ == '__main__':
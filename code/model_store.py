@@ -0,0 +1,69 @@
+import glob
+import hashlib
+import json
+import logging as log
+import os
+
+import joblib
+import sklearn
+
+import document_cache as dc
+import feature_store as fs
+import global_variables as gv
+
+# features an estimator was trained on and the vectorizer files it depends on; Doc2Vec.save writes the large
+# arrays to "<model>.<attribute>.npy" files next to the model, a retrained model can change only those
+# the hashing trick has no fitted state, only the number of features recorded with the model
+feature_dependencies = {
+    "doc2vec": lambda: [gv.prj_src_path + "python_objects/document_model.doc2vec"] + sorted(
+        glob.glob(glob.escape(gv.prj_src_path + "python_objects/document_model.doc2vec") + ".*.npy")),
+    "dictvectorizer": lambda: [fs.vocabulary_file_name("data_transformed")],
+    "hashed": lambda: []}
+
+
+def model_file_name(name):
+    return "%spython_objects/models/%s.joblib" % (gv.prj_src_path, name)
+
+
+def metadata_file_name(name):
+    return "%spython_objects/models/%s.json" % (gv.prj_src_path, name)
+
+
+def features_of(data_name):
+    if data_name.endswith("_vector"):
+        return "doc2vec"
+    if data_name.endswith("_hashed"):
+        return "hashed"
+    return "dictvectorizer"
+
+
+def dependency_hash(features):
+    sha = hashlib.sha1()
+    for file_name in feature_dependencies[features]():
+        sha.update(("%s:%s\n" % (os.path.basename(file_name), dc.content_hash(file_name))).encode("utf-8"))
+    return sha.hexdigest()
+
+
+def save_model(name, clf, features, s_u, n_features, dependency):
+    # dependency is dependency_hash(features), computed once by the caller for all models of a data set
+    os.makedirs(os.path.dirname(model_file_name(name)), exist_ok=True)
+    # uncompressed, so the numpy arrays inside the estimator can be memory-mapped on load
+    joblib.dump(clf, model_file_name(name), compress=0)
+    metadata = {"features": features, "type": s_u, "n_features": n_features, "sklearn": sklearn.__version__,
+                "dependency": dependency}
+    with open(metadata_file_name(name), "wt", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+
+
+def load_metadata(name):
+    with open(metadata_file_name(name), "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_model(name, mmap_mode='r'):
+    metadata = load_metadata(name)
+    if metadata["sklearn"] != sklearn.__version__:
+        log.warning("%s was saved with sklearn %s, running %s" % (name, metadata["sklearn"], sklearn.__version__))
+    if dependency_hash(metadata["features"]) != metadata["dependency"]:
+        log.warning("%s: %s changed since the model was trained" % (name, metadata["features"]))
+    return joblib.load(model_file_name(name), mmap_mode=mmap_mode), metadata
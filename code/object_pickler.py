@@ -1,8 +1,14 @@
 import pickle
 import os
 import logging as log
+import tempfile
+from contextlib import contextmanager
 from os import path
 
+# mkstemp creates owner-only files, renamed files get the mode a plain open() would have given them
+umask = os.umask(0)
+os.umask(umask)
+
 
 def load_object(file_name):
     object = dict()
@@ -19,17 +25,27 @@ def load_object(file_name):
     return object
 
 
-def save_object(python_object, file_name):
+@contextmanager
+def atomic_open(file_name, mode='wb', **kwargs):
+    # written next to file_name and renamed over it, an interrupted write leaves the previous file intact
+    fd, temp_file_name = tempfile.mkstemp(dir=path.dirname(file_name) or '.', prefix='.' + path.basename(file_name))
     try:
-        if not path.exists(file_name + '.p'):
-            os.mknod(file_name + '.p')
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            f.flush()
+            os.fchmod(f.fileno(), 0o666 & ~umask)
+            os.fsync(f.fileno())
+        os.replace(temp_file_name, file_name)
+    except BaseException:
+        if path.exists(temp_file_name):
+            os.remove(temp_file_name)
+        raise
 
-        with open(file_name + '.p', 'wb+') as fp:
-            try:
-                pickle.dump(python_object, fp, protocol=pickle.HIGHEST_PROTOCOL)
-            except Exception as e:
-                log.warning(("Error dump file: ", file_name))
-                log.error(e)
+
+def save_object(python_object, file_name):
+    try:
+        with atomic_open(file_name + '.p') as fp:
+            pickle.dump(python_object, fp, protocol=pickle.HIGHEST_PROTOCOL)
     except Exception as ex:
-        log.warning(("In save error open file: ", file_name))
+        log.warning(("Error dump file: ", file_name))
         log.error(ex)
@@ -0,0 +1,34 @@
+import argparse
+import logging as log
+import time
+
+import corpus_manifest as cm
+import corpus_shards as cs
+import timer
+
+log.basicConfig(filename='pack_corpus.log', level=log.DEBUG, filemode="w")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the corpus into large shard files read by file_collector")
+    parser.add_argument("--shard-size", type=int, default=1024, help="shard size in MB")
+    parser.add_argument("--force", action="store_true", help="pack even if no file changed since the last pack")
+    args = parser.parse_args()
+
+    cm.refresh()
+    file_stats = cm.file_stats()
+    stale = cs.stale_files(file_stats)
+    log.info(("Files changed since the last pack:", len(stale)))
+    if len(stale) > 0 or args.force:
+        packed = cs.pack(file_stats, shard_size=args.shard_size << 20)
+        log.info(("Files packed:", packed))
+
+
+if __name__ == '__main__':
+    start = time.time()
+    log.info(("Pack corpus started: ", time.localtime(start)))
+    try:
+        main()
+    except Exception as ex:
+        log.exception(ex)
+    timer.time_executed(start, "Pack corpus")
@@ -1,91 +1,93 @@
 import time
 import timer
+import numpy as np
 import pandas as pd
 import logging as log
-import object_pickler as op
+import artifact_store as ars
+import embedding as emb
 import global_variables as gv
+import feature_store as fs
 import graph_generator as gg
-
-from sklearn.manifold import TSNE
+import vector_store as vs
+from data_labeller import as_translated
 
 log.basicConfig(filename='plot_cluster.log', level=log.DEBUG, filemode="w")
 
 
-def load_pickle(filename):
-    # filename without extension
-    return op.load_object(gv.prj_src_path + "python_objects/" + filename)
+def load_artifact(filename):
+    # filename without extension, old .p pickles are still read
+    return ars.load(filename)
 
 
-def run():
+def run(max_points=None, embedding_method="tsne"):
     predicted_label = {"unsupervised": ["KMeans_"],
                        "supervised": ["LogisticRegression_", "SVC_linear_", "SVC_poly_", "SVC_rbf_"]}
-    target_names = [gv.label_name[i] for i in gv.translation_rev]
-
-    # # dimension reduction dictvectorizer
-    # test_transformed = load_pickle("test_data_transformed")
-    # test_transformed_embedded = TSNE(n_components=2).fit_transform(test_transformed)
-    # op.save_object(test_transformed_embedded, gv.prj_src_path + "python_objects/test_2d_data_transformed")
-    #
-    # # dimension reduction doc2vec
-    # test_vector = load_pickle("test_vector")
-    # test_vector_embedded = TSNE(n_components=2).fit_transform(test_vector)
-    # op.save_object(test_vector_embedded, gv.prj_src_path + "python_objects/test_2d_data_vector")
-
-    test_embedded_dictvectorizer = load_pickle("test_2d_data_transformed")
-    test_embedded_doc2vec = load_pickle("test_2d_data_vector")
+    target_names = np.array([gv.label_name[i] for i in gv.translation_rev])
+
+    # dimension reduction, cached by the hash of the input matrix
+    test_embedded_dictvectorizer = emb.embed_2d(fs.load_features("test_data_transformed"), method=embedding_method)
+    test_embedded_doc2vec = emb.embed_2d(vs.load_vectors("test_vector"), method=embedding_method)
     fig_num = 0
+    charts = list()
     df_dictvectorizer = pd.DataFrame(test_embedded_dictvectorizer, columns=["x", "y"])
     for algo in predicted_label["supervised"]:
         log.debug("plotting: " + algo + "test_dictvectorizer_predict")
         fig_num += 1
-        predict = load_pickle(algo + "test_data_transformed_predict")
-        df_dictvectorizer[algo + "prediction"] = [target_names[p] for p in predict]
-        gg.plot_cluster(title=algo + "test_dictvectorizer_predict", data=df_dictvectorizer, pad=30,
-                        plot_name=gv.prj_src_path + "generated_plots/" + algo + "test_dictvectorizer_predict",
-                        fig_num=fig_num, l_col=3, hue=algo + "prediction")
+        predict = load_artifact(algo + "test_data_transformed_predict")
+        df_dictvectorizer[algo + "prediction"] = target_names[predict]
+        charts.append((gg.plot_cluster,
+                       dict(title=algo + "test_dictvectorizer_predict", data=df_dictvectorizer, pad=30,
+                            plot_name=gv.prj_src_path + "generated_plots/" + algo + "test_dictvectorizer_predict",
+                            fig_num=fig_num, l_col=3, hue=algo + "prediction", max_points=max_points)))
 
     # for algo in predicted_label["unsupervised"]:
     #     fig_num += 1
-    #     predict = load_pickle(algo + "test_data_transformed_predict")
+    #     predict = load_artifact(algo + "test_data_transformed_predict")
     #     df_dictvectorizer[algo + "prediction"] = predict
-    #     gg.plot_cluster(title=algo + "test_dictvectorizer_predict", data=df_dictvectorizer, pad=30,
-    #                     plot_name=gv.prj_src_path + "generated_plots/" + algo + "test_dictvectorizer_predict",
-    #                     fig_num=fig_num, l_col=2, hue=algo + "prediction")
+    #     charts.append((gg.plot_cluster,
+    #                    dict(title=algo + "test_dictvectorizer_predict", data=df_dictvectorizer, pad=30,
+    #                         plot_name=gv.prj_src_path + "generated_plots/" + algo + "test_dictvectorizer_predict",
+    #                         fig_num=fig_num, l_col=2, hue=algo + "prediction", max_points=max_points)))
 
-    labels = load_pickle("test_labels")
-    labels = [gv.translation[x] for x in labels]
+    labels = as_translated(load_artifact("test_labels"))
     log.debug(df_dictvectorizer.shape)
-    df_dictvectorizer["ground_truth"] = [target_names[label] for label in labels]
+    df_dictvectorizer["ground_truth"] = target_names[labels]
     fig_num += 1
-    gg.plot_cluster(title="Ground truth Dictvectorizer", data=df_dictvectorizer, pad=30,
-                    plot_name=gv.prj_src_path + "generated_plots/ground_truth_dictvectorizer", fig_num=fig_num, l_col=3,
-                    hue="ground_truth")
+    charts.append((gg.plot_cluster,
+                   dict(title="Ground truth Dictvectorizer", data=df_dictvectorizer, pad=30,
+                        plot_name=gv.prj_src_path + "generated_plots/ground_truth_dictvectorizer", fig_num=fig_num,
+                        l_col=3, hue="ground_truth", max_points=max_points)))
 
     df_doc2vec = pd.DataFrame(test_embedded_doc2vec, columns=["x", "y"])
     for algo in predicted_label["supervised"]:
         log.debug("plotting: " + algo + "test_doc2vec_predict")
         fig_num += 1
-        predict = load_pickle(algo + "test_vector_predict")
-        df_doc2vec[algo + "prediction"] = [target_names[p] for p in predict]
-        gg.plot_cluster(title=algo + "test_doc2vec_predict", data=df_doc2vec, pad=30,
-                        plot_name=gv.prj_src_path + "generated_plots/" + algo + "test_doc2vec_predict",
-                        fig_num=fig_num, l_col=3, hue=algo + "prediction")
+        predict = load_artifact(algo + "test_vector_predict")
+        df_doc2vec[algo + "prediction"] = target_names[predict]
+        charts.append((gg.plot_cluster,
+                       dict(title=algo + "test_doc2vec_predict", data=df_doc2vec, pad=30,
+                            plot_name=gv.prj_src_path + "generated_plots/" + algo + "test_doc2vec_predict",
+                            fig_num=fig_num, l_col=3, hue=algo + "prediction", max_points=max_points)))
 
     # for algo in predicted_label["unsupervised"]:
     #     fig_num += 1
-    #     predict = load_pickle(algo + "est_vector_predict")
+    #     predict = load_artifact(algo + "est_vector_predict")
     #     df_doc2vec[algo + "prediction"] = predict
-    #     gg.plot_cluster(title=algo + "test_doc2vec_predict", data=df_doc2vec, pad=30,
-    #                     plot_name=gv.prj_src_path + "generated_plots/" + algo + "test_doc2vec_predict",
-    #                     fig_num=fig_num, l_col=2, hue=algo + "prediction")
+    #     charts.append((gg.plot_cluster,
+    #                    dict(title=algo + "test_doc2vec_predict", data=df_doc2vec, pad=30,
+    #                         plot_name=gv.prj_src_path + "generated_plots/" + algo + "test_doc2vec_predict",
+    #                         fig_num=fig_num, l_col=2, hue=algo + "prediction", max_points=max_points)))
 
-    labels = load_pickle("test_labels")
-    labels = [gv.translation[x] for x in labels]
-    df_doc2vec["ground_truth"] = [target_names[label] for label in labels]
+    labels = as_translated(load_artifact("test_labels"))
+    df_doc2vec["ground_truth"] = target_names[labels]
     fig_num += 1
-    gg.plot_cluster(title="Ground truth Doc2Vec", data=df_doc2vec, pad=30,
-                    plot_name=gv.prj_src_path + "generated_plots/ground_truth_doc2vec", fig_num=fig_num, l_col=3,
-                    hue="ground_truth")
+    charts.append((gg.plot_cluster,
+                   dict(title="Ground truth Doc2Vec", data=df_doc2vec, pad=30,
+                        plot_name=gv.prj_src_path + "generated_plots/ground_truth_doc2vec", fig_num=fig_num,
+                        l_col=3, hue="ground_truth", max_points=max_points)))
+
+    # the data frames are complete now, every chart is independent of the others
+    gg.render_charts(charts)
 
 
 def main():
@@ -30,3 +30,27 @@ class PreprocessGenerator(Iterator):
         except StopIteration:
             self._iter = None
             raise StopIteration
+
+
+def write_corpus_file(train_corpus_list, corpus_file):
+    # tokenize once, one space separated document per line (gensim LineSentence / corpus_file format)
+    with open(corpus_file, "wt", encoding="utf-8") as f:
+        for tcd in train_corpus_list:
+            if len(tcd.strip()) != 0:
+                f.write(" ".join(gensim.utils.simple_preprocess(tcd)) + "\n")
+
+
+class TokenizedCorpus(object):
+    def __init__(self, corpus_file, tokens_only=False):
+        self.corpus_file = corpus_file
+        self.tokens_only = tokens_only
+
+    def __iter__(self):
+        with open(self.corpus_file, "rt", encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                tokens = line.split()
+                if self.tokens_only:
+                    yield tokens
+                else:
+                    # tags are line numbers, the same as Doc2Vec corpus_file training
+                    yield gensim.models.doc2vec.TaggedDocument(tokens, [i])
@@ -1,8 +1,12 @@
+import json
+import os
 import time
 import logging as log
-import object_pickler as op
+import pandas as pd
+import artifact_store as ars
 import global_variables as gv
 import timer
+from data_labeller import as_translated
 from sklearn.metrics import homogeneity_score, completeness_score, v_measure_score, adjusted_rand_score, \
     adjusted_mutual_info_score
 from sklearn.metrics import classification_report, accuracy_score, precision_score, recall_score, f1_score
@@ -10,22 +14,42 @@ from sklearn.metrics import classification_report, accuracy_score, precision_sco
 log.basicConfig(filename='scoring.log', level=log.DEBUG, filemode="w")
 
 
-def load_pickle(filename):
-    # filename without extension
-    return op.load_object(gv.prj_src_path + "python_objects/" + filename)
+def load_artifact(filename):
+    # filename without extension, old .p pickles are still read
+    return ars.load(filename)
+
+
+def results_file_name():
+    return gv.prj_src_path + "python_objects/train_test_results.json"
+
+
+def fit_time_report():
+    # accuracy next to fit time for the SVC variants and the fast estimator tier
+    with open(results_file_name(), "rt", encoding="utf-8") as f:
+        results = pd.DataFrame(json.load(f))
+    test_labels = load_artifact("test_labels")
+    y_true = as_translated(test_labels)
+    report = results[results["type"] != "unsupervised"].copy()
+    report["accuracy"] = [accuracy_score(y_true, load_artifact("%s_%s_predict" % (algo, test_data)))
+                          for algo, test_data in zip(report["algorithm"], report["test_data"])]
+    report = report[["data", "type", "algorithm", "accuracy", "fit_seconds", "predict_seconds"]] \
+        .sort_values(["data", "fit_seconds"])
+    log.info("accuracy vs. fit time:\n%s" % report.to_string(index=False))
+    report.to_csv(gv.prj_src_path + "python_objects/fit_time_report.csv", index=False)
+    return report
 
 
 def run():
-    predicted_label = {"unsupervised": ["KMeans_"],
+    predicted_label = {"unsupervised": ["KMeans_", "MiniBatchKMeans_", "SphericalKMeans_"],
                        "supervised": ["LogisticRegression_", "SVC_linear_", "SVC_poly_", "SVC_rbf_"]}
     processes={"test_data_transformed_predict", "test_vector_predict"}
 
-    test_labels = load_pickle("test_labels")
-    y_true = [gv.translation[x] for x in test_labels]
+    test_labels = load_artifact("test_labels")
+    y_true = as_translated(test_labels)
     target_names = [gv.label_name[i] for i in gv.translation_rev]
     for algo in predicted_label["supervised"]:
         for process in processes:
-            predict = load_pickle(algo + process)
+            predict = load_artifact(algo + process)
             # predict = loadPickle(algo + "test_vector")
             accuracy = accuracy_score(y_true, predict)
             f1 = f1_score(y_true, predict, average='macro')
@@ -39,7 +63,7 @@ def run():
 
     for algo in predicted_label["unsupervised"]:
         for process in processes:
-            predict = load_pickle(algo + process)
+            predict = load_artifact(algo + process)
             # predict = loadPickle(algo + "test_vector")
             score_h = homogeneity_score(y_true, predict)
             score_c = completeness_score(y_true, predict)
@@ -50,6 +74,10 @@ def run():
                      "\n\tadjusted_rand:\t%s\n\tadjusted_mutual_info:\t%s" %
                      (algo + process, score_h, score_c, score_v, score_a, score_am))
 
+    # predictions from before train_test recorded its timings have no results file
+    if os.path.exists(results_file_name()):
+        fit_time_report()
+
 
 def main():
     run()
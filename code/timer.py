@@ -15,7 +15,10 @@ from sklearn.cluster import KMeans, AffinityPropagation, MeanShift
 def time_executed(start_time, process_name):
     end_time = time.time()
     log.info("%s ended: %s" % (process_name, time.localtime(end_time)))
-    execution_time = end_time - start_time
+    log_duration(end_time - start_time, process_name)
+
+
+def log_duration(execution_time, process_name):
     hours, rem = divmod(execution_time, 3600)
     minutes, seconds = divmod(rem, 60)
     log.info((process_name, " executed for {:0>2}:{:0>2}:{:05.2f}".format(int(hours), int(minutes), seconds)))
@@ -0,0 +1,43 @@
+import json
+import os
+
+import numpy as np
+
+import global_variables as gv
+from object_pickler import atomic_open
+
+
+def vector_file_name(name):
+    return "%spython_objects/%s.npy" % (gv.prj_src_path, name)
+
+
+def index_file_name(name):
+    return "%spython_objects/%s_index.json" % (gv.prj_src_path, name)
+
+
+def exists(name):
+    return os.path.exists(vector_file_name(name))
+
+
+def save_vectors(name, vectors):
+    # one contiguous float32 matrix per split, rows in the order of the index
+    if isinstance(vectors, np.memmap) and os.path.abspath(vectors.filename) == os.path.abspath(vector_file_name(name)):
+        vectors.flush()
+        return
+    with atomic_open(vector_file_name(name)) as f:
+        np.save(f, np.asarray(vectors, dtype=np.float32))
+
+
+def save_index(name, paths, labels):
+    with atomic_open(index_file_name(name), "wt", encoding="utf-8") as f:
+        json.dump({"paths": list(paths), "labels": np.asarray(labels).tolist()}, f)
+
+
+def load_vectors(name, mmap_mode='r'):
+    return np.load(vector_file_name(name), mmap_mode=mmap_mode)
+
+
+def load_index(name):
+    with open(index_file_name(name), "rt", encoding="utf-8") as f:
+        index = json.load(f)
+    return index["paths"], index["labels"]